@@ -0,0 +1,404 @@
+"""Benchmarks for the hot paths, headless via the SDL dummy drivers.
+
+    python bench.py                       # alles, resultaten naar bench_results.json
+    python bench.py --quick               # minder herhalingen, voor een snelle check
+    python bench.py --only update_game    # enkel benchmarks waarvan de naam zo begint
+    python bench.py --save-baseline       # resultaten ook als bench_baseline.json bewaren
+    python bench.py --baseline bench_baseline.json   # vergelijken, exit code 1 bij regressies
+
+Every timing result has ops/s and p50/p99/mean times in ms; the alloc/
+results have tracemalloc bytes per sim step and per frame instead, and
+clock_sync/ the song clock's error in ms against a simulated mixer. The
+file also holds the peak RSS of the run.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+import platform
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+import game_logic
+import game_draw
+import menu
+from chart_cache import Chart, compile_chart
+from draw_utils import text_cache
+from particles import ParticleSystem
+from score_store import ScoreStore
+from song_clock import SongClock
+from songs import find_songs, load_song, prepare_song
+
+SONG_DIR = "songs"
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+BLOCK_COLORS = [(0, 200, 200), (255, 50, 50), (50, 255, 50), (200, 0, 200), (255, 165, 0)]
+LANE_LABELS = ["D", "F", "J", "K"]
+PIXELS_PER_SECOND = 300
+SIM_HZ = 120
+
+
+def stats(samples):
+    """ops/s and percentiles for a list of durations in seconds."""
+    samples = sorted(samples)
+    n = len(samples)
+    total = sum(samples)
+
+    def pct(q):
+        return samples[min(n - 1, int(q * n))] * 1000
+
+    return {"n": n, "ops_per_s": round(n / total, 1) if total else None,
+            "p50_ms": round(pct(0.50), 4), "p99_ms": round(pct(0.99), 4),
+            "mean_ms": round(total / n * 1000, 4)}
+
+
+def timed(fn, n, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return stats(samples)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux geeft KB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def synthetic_chart(n, length=120.0, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.uniform(0.0, length, n))
+    pitches = rng.integers(0, 128, n, dtype=np.uint8)
+    return Chart(memoryview(times), memoryview(pitches), memoryview(pitches % 4), length, b"")
+
+
+def lane_layout(size, lanes=4, spacing=20):
+    # zelfde formules als main.py
+    w, h = size
+    lane_width = int(w * 0.12)
+    lane_left = (w - (lane_width * lanes + spacing * (lanes - 1))) // 2
+    return lane_left, lane_width, spacing, int(h * 0.8)
+
+
+# ---------- benchmarks ----------
+
+def bench_load_song(results, quick):
+    songs = find_songs(SONG_DIR)
+    screen = pygame.display.set_mode(RESOLUTIONS["1080p"])
+    repeat = 3 if quick else 10
+    for song in songs:
+        name = song["name"]
+        results[f"load_song/compile/{name}"] = timed(lambda: compile_chart(song["midi"]), 1 if quick else 3, warmup=0)
+        try:
+            load_song(song, screen)
+            fn = lambda: load_song(song, screen)
+        except pygame.error:
+            # geen midi synth (bv. linux zonder timidity): enkel het deel zonder mixer
+            fn = lambda: prepare_song(song, screen.get_size())
+            name += "/no-mixer"
+        results[f"load_song/warm/{name}"] = timed(fn, repeat)
+
+
+def bench_update_game(results, quick):
+    sizes = (1000, 10000) if quick else (1000, 10000, 100000)
+    size = RESOLUTIONS["1080p"]
+    lane_left, lane_width, spacing, hit_y = lane_layout(size)
+    dt = 1.0 / SIM_HZ
+    for n in sizes:
+        chart = synthetic_chart(n)
+        for level, block_size in game_logic.DIFFICULTY_BLOCK_SIZE.items():
+            lead_time = (hit_y - block_size / 2) / PIXELS_PER_SECOND
+            t0 = time.perf_counter()
+            judge = game_logic.HitJudge(chart.times, chart.pitches, 4, block_size * 1.5 / PIXELS_PER_SECOND, lead_time)
+            setup_ms = (time.perf_counter() - t0) * 1000
+
+            scheduler = game_logic.NoteScheduler(chart)
+            blocks = game_logic.BlockStore()
+            miss_window = game_logic.HIT_WINDOWS_MS[level][-1] / 1000.0
+            steps = int((chart.length + lead_time + 2) * SIM_HZ)
+            if quick:
+                steps = min(steps, 3000)
+            samples = []
+            for i in range(1, steps + 1):
+                t = i * dt
+                t0 = time.perf_counter()
+                game_logic.update_game(t, scheduler, blocks, BLOCK_COLORS, 0, lane_left, lane_width, spacing,
+                                       block_size, hit_y, True, pixels_per_second=PIXELS_PER_SECOND,
+                                       playable=judge.playable, miss_window=miss_window, now=t)
+                samples.append(time.perf_counter() - t0)
+            results[f"update_game/{n}/M{block_size}"] = {**stats(samples), "setup_ms": round(setup_ms, 2)}
+
+
+def _busy_playfield(size):
+    # een speelveld midden in een druk liedje: blokken in alle states plus vonkjes
+    lane_left, lane_width, spacing, hit_y = lane_layout(size)
+    blocks = game_logic.BlockStore()
+    rng = random.Random(0)
+    for i in range(48):
+        lane = i % 4
+        slot = blocks.spawn(i * 0.1, lane, lane_left + lane * (lane_width + spacing) + 10, lane_width - 20, 100, i % 5)
+        if i % 7 == 0:
+            blocks.mark_hit(slot, time.time())
+    blocks.update(4.0, PIXELS_PER_SECOND, hit_y + 150, time.time())
+    blocks.place(4.0, PIXELS_PER_SECOND)
+    pieces = ParticleSystem()
+    for _ in range(20):
+        pieces.burst(rng.randrange(size[0]), rng.randrange(size[1]), (0, 255, 0))
+    return blocks, pieces, lane_left, lane_width, spacing, hit_y
+
+
+def bench_render(results, quick):
+    frames = 30 if quick else 120
+    font_small = pygame.font.Font(None, 32)
+    font_medium = pygame.font.Font(None, 48)
+    font_big = pygame.font.Font(None, 72)
+    store = ScoreStore(":memory:")
+    songs = find_songs(SONG_DIR)
+    for label, size in RESOLUTIONS.items():
+        screen = pygame.display.set_mode(size)
+        background = pygame.Surface(size).convert()
+        background.fill((30, 30, 60))
+        blocks, pieces, lane_left, lane_width, spacing, hit_y = _busy_playfield(size)
+
+        def game_frame():
+            game_draw.render_game(screen, background, BLOCK_COLORS, blocks, LANE_LABELS, lane_left, lane_width,
+                                  spacing, hit_y, font_small, font_big, 0, False, True, 12345, 42, 0,
+                                  active_pieces=pieces, elapsed=30.0, song_length=120.0, score_multiplier=2)
+
+        gear_rect = pygame.Rect(size[0] - 80, 30, 50, 50)
+
+        def menu_frame():
+            menu.render_menu(screen, songs, 3, False, 1, 0, BLOCK_COLORS, font_small, font_medium, font_big,
+                             gear_rect, score_store=store)
+
+        results[f"render_game/{label}"] = timed(game_frame, frames)
+        results[f"render_menu/{label}"] = timed(menu_frame, frames)
+    store.close()
+    results["render/text_cache"] = text_cache.stats()
+
+
+def bench_seg_intersects(results, quick):
+    rng = np.random.default_rng(1)
+    counts = (100, 1000) if quick else (100, 1000, 10000)
+    repeat = 20 if quick else 100
+    for n in counts:
+        xs = rng.integers(0, 1800, n)
+        ys = rng.integers(0, 1000, n)
+        ws = np.full(n, 180)
+        hs = np.full(n, 100)
+        rects = [pygame.Rect(int(x), int(y), int(w), int(h)) for x, y, w, h in zip(xs, ys, ws, hs)]
+        p1, p2 = (200, 300), (1500, 700)
+        results[f"seg_intersects_rect/scalar/{n}"] = timed(
+            lambda: [game_logic.seg_intersects_rect(p1, p2, r) for r in rects], max(3, repeat // 10))
+        results[f"seg_intersects_rect/batched/{n}"] = timed(
+            lambda: game_logic.segment_hits(p1, p2, xs, ys, ws, hs), repeat)
+
+
+def _alloc_stats(samples):
+    samples = np.sort(samples).tolist()
+    n = len(samples)
+    return {"n": n, "p50_bytes": samples[n // 2], "p99_bytes": samples[min(n - 1, int(0.99 * n))], "max_bytes": samples[-1]}
+
+
+def bench_allocations(results, quick):
+    """tracemalloc over a whole song: bytes allocated per sim step and per rendered frame.
+
+    Per call the peak above the memory in use before it, so everything that
+    was allocated and freed again counts too. What is left after the pool
+    is reserved are Python objects (floats, the lists pygame draws from),
+    no NumPy arrays; `growth_bytes` is what stayed allocated after the song.
+    """
+    size = RESOLUTIONS["1080p"]
+    screen = pygame.display.set_mode(size)
+    font = pygame.font.Font(None, 32)
+    lane_left, lane_width, spacing, hit_y = lane_layout(size)
+    block_size = game_logic.DIFFICULTY_BLOCK_SIZE[1]
+    lead_time = (hit_y - block_size / 2) / PIXELS_PER_SECOND
+    chart = synthetic_chart(400 if quick else 1200, length=20.0 if quick else 60.0)
+    judge = game_logic.HitJudge(chart.times, chart.pitches, 4, block_size * 1.5 / PIXELS_PER_SECOND, lead_time)
+    scheduler = game_logic.NoteScheduler(chart)
+    blocks = game_logic.BlockStore()
+    blocks.reserve(game_logic.peak_notes_in_window(chart.times, (hit_y + block_size * 1.5) / PIXELS_PER_SECOND
+                                                   + blocks.FADE_SECONDS))
+    pieces = ParticleSystem()
+    miss_window = game_logic.HIT_WINDOWS_MS[1][-1] / 1000.0
+    dt = 1.0 / SIM_HZ
+    steps = int((chart.length + lead_time + 2) * SIM_HZ)
+
+    def sim(i):
+        t = i * dt
+        game_logic.update_game(t, scheduler, blocks, BLOCK_COLORS, 0, lane_left, lane_width, spacing,
+                               block_size, hit_y, True, pixels_per_second=PIXELS_PER_SECOND,
+                               playable=judge.playable, miss_window=miss_window, now=t)
+        pieces.update(dt, max_y=size[1] + 200)
+
+    def frame(i):
+        blocks.place(i * dt, PIXELS_PER_SECOND)
+        game_draw.render_game(screen, None, BLOCK_COLORS, blocks, LANE_LABELS, lane_left, lane_width, spacing,
+                              hit_y, font, font, 0, False, True, 0, 0, 0, active_pieces=pieces)
+
+    # opwarmen: sprites en teksten in de caches, buffers op grootte
+    for i in range(1, SIM_HZ):
+        sim(i)
+        frame(i)
+
+    # resultaten in arrays van vaste grootte, anders meet growth vooral deze lijsten
+    sim_bytes = np.zeros(steps - SIM_HZ, np.int64)
+    frame_bytes = np.zeros((steps - SIM_HZ + 1) // 2, np.int64)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(SIM_HZ, steps):
+        if i % (SIM_HZ // 2) == 0:
+            pieces.burst(size[0] // 2, hit_y, (0, 255, 0))
+        tracemalloc.reset_peak()
+        in_use = tracemalloc.get_traced_memory()[0]
+        sim(i)
+        sim_bytes[i - SIM_HZ] = tracemalloc.get_traced_memory()[1] - in_use
+        if i % 2 == 0:  # 60 fps renderen bij 120 Hz simulatie
+            tracemalloc.reset_peak()
+            in_use = tracemalloc.get_traced_memory()[0]
+            frame(i)
+            frame_bytes[(i - SIM_HZ) // 2] = tracemalloc.get_traced_memory()[1] - in_use
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    results["alloc/sim_step"] = {**_alloc_stats(sim_bytes), "pool_grows": blocks.grows}
+    results["alloc/frame"] = {**_alloc_stats(frame_bytes), "growth_bytes": growth}
+
+
+def _clock_errors(fps, stepped, seconds, seed=0):
+    """Runs a SongClock on a virtual clock against a fake mixer; returns |clock - audio| per frame after settling."""
+    rng = random.Random(seed)
+    now = 0.0
+    lead_time = 1.0
+    buffer = 1024 / 44100
+
+    def position():
+        played = now - lead_time
+        if played < 0:
+            return None
+        if stepped:
+            # oude mixers: enkel per audio buffer een nieuwe waarde
+            return played // buffer * buffer
+        # pygame 2: get_pos() is zelf geinterpoleerd, op de ms afgerond
+        return int(played * 1000) / 1000.0
+
+    clock = SongClock(audio_position=position, clock=lambda: now)
+    clock.start(lead_time)
+    clock.music_started()
+    errors = []
+    while now < lead_time + seconds:
+        now += rng.uniform(0.8, 1.2) / fps
+        t = clock.time()
+        if now > lead_time + 1.0:
+            errors.append(abs(t - now))
+    return np.array(errors)
+
+
+def bench_clock_sync(results, quick):
+    """Song clock vs the audio it follows, for an interpolating and a stepped get_pos(), at 30/60/144 fps.
+
+    Not a timing: the clock runs on a virtual perf_counter, so this checks
+    the sync logic itself. An error that grows with the frame interval means
+    the clock misjudges when a reading was taken.
+    """
+    for source in ("interpolated", "stepped"):
+        for fps in (30, 60, 144):
+            errors = _clock_errors(fps, source == "stepped", 20.0 if quick else 120.0) * 1000
+            results[f"clock_sync/{source}/{fps}fps"] = {"mean_error_ms": round(float(errors.mean()), 3),
+                                                        "max_error_ms": round(float(errors.max()), 3)}
+
+
+BENCHMARKS = {
+    "load_song": bench_load_song,
+    "update_game": bench_update_game,
+    "render": bench_render,
+    "seg_intersects_rect": bench_seg_intersects,
+    "alloc": bench_allocations,
+    "clock_sync": bench_clock_sync,
+}
+
+
+# ---------- baseline ----------
+
+def compare(results, baseline, tolerance):
+    """Prints current vs baseline p50 per benchmark; returns the names that got slower than the tolerance."""
+    regressions = []
+    print(f"{'benchmark':<48} {'base p50':>10} {'now p50':>10} {'change':>8}")
+    for name, res in sorted(results.items()):
+        base = baseline.get(name)
+        if not isinstance(res, dict) or not isinstance(base, dict) or "p50_ms" not in res or "p50_ms" not in base:
+            continue
+        change = res["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  SLOWER"
+            regressions.append(name)
+        print(f"{name:<48} {base['p50_ms']:>10.3f} {res['p50_ms']:>10.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MIDI Hero benchmarks")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--only", action="append", default=[], help="only run benchmarks starting with this name")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results to bench_baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed p50 slowdown before failing (0.20 = 20%%)")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        pass
+
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if args.only and not any(name.startswith(o) or o.startswith(name) for o in args.only):
+            continue
+        t0 = time.perf_counter()
+        bench(results, args.quick)
+        print(f"[bench] {name}: {time.perf_counter() - t0:.1f}s", flush=True)
+
+    report = {
+        "meta": {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "pygame": pygame.version.ver, "numpy": np.__version__, "platform": platform.platform(),
+                 "quick": args.quick, "peak_rss_mb": peak_rss_mb()},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] results in {args.out}, peak RSS {report['meta']['peak_rss_mb']} MB")
+    if args.save_baseline:
+        with open("bench_baseline.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"[bench] {len(regressions)} regression(s) over {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
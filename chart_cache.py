@@ -0,0 +1,155 @@
+import os
+import mmap
+import struct
+import hashlib
+import mido
+
+# Gecompileerde chart naast elke .mid: "<naam>.mid.chart"
+# Layout: header | float64 times[n] | uint8 pitches[n] | uint8 lanes[n]
+CHART_MAGIC = b"MHCH"
+CHART_VERSION = 1
+CHART_EXT = ".chart"
+
+# magic, version, lanes, midi mtime_ns, midi size, song length, digest, note count
+_HEADER = struct.Struct("<4sHHqqd16sI")
+# times array op 8 bytes uitlijnen zodat cast('d') zonder kopie werkt
+_DATA_OFFSET = (_HEADER.size + 7) & ~7
+
+
+class Chart:
+    """Flat note chart: parallel typed arrays sorted by time.
+
+    `times`, `pitches` and `lanes` are memoryviews, either straight on the
+    mmapped cache file or on an in-memory buffer when mapping is not possible.
+    """
+
+    def __init__(self, times, pitches, lanes, length, digest, buf=None):
+        self.times = times
+        self.pitches = pitches
+        self.lanes = lanes
+        self.length = length
+        self.digest = digest
+        self._buf = buf  # houdt de mmap open zolang de chart leeft
+
+    def __len__(self):
+        return len(self.times)
+
+
+def chart_path(midi_path):
+    return midi_path + CHART_EXT
+
+
+def _file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.digest()
+
+
+def _parse_midi(midi_path):
+    mid = mido.MidiFile(midi_path)
+    notes = []
+    t = 0
+    for msg in mid:
+        t += msg.time
+        if getattr(msg, "type", None) == "note_on" and getattr(msg, "velocity", 0) > 0:
+            notes.append((t, msg.note))
+
+    # mido geeft de berichten al in volgorde, maar de chart moet gegarandeerd gesorteerd zijn
+    notes.sort(key=lambda n: n[0])
+    # t is na de loop de (ongeveer) lengte van het liedje in seconden
+    return notes, t
+
+
+def _pack(notes, length, lanes, mtime_ns, size, digest):
+    count = len(notes)
+    buf = bytearray(_DATA_OFFSET + count * 10)
+    _HEADER.pack_into(buf, 0, CHART_MAGIC, CHART_VERSION, lanes, mtime_ns, size, length, digest, count)
+    struct.pack_into(f"<{count}d", buf, _DATA_OFFSET, *(n[0] for n in notes))
+    p = _DATA_OFFSET + count * 8
+    buf[p:p + count] = bytes(n[1] & 0x7F for n in notes)
+    buf[p + count:p + 2 * count] = bytes(n[1] % lanes for n in notes)
+    return buf
+
+
+def _unpack(buf):
+    magic, version, lanes, mtime_ns, size, length, digest, count = _HEADER.unpack_from(buf, 0)
+    view = memoryview(buf)
+    p = _DATA_OFFSET + count * 8
+    times = view[_DATA_OFFSET:p].cast("d")
+    pitches = view[p:p + count]
+    lane_view = view[p + count:p + 2 * count]
+    return Chart(times, pitches, lane_view, length, digest, buf)
+
+
+def _read_header(path):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < _HEADER.size:
+        return None
+    header = _HEADER.unpack(raw)
+    if header[0] != CHART_MAGIC or header[1] != CHART_VERSION:
+        return None
+    return header
+
+
+def compile_chart(midi_path, lanes=4):
+    """Parses the MIDI and writes the compiled chart next to it.
+
+    Returns the packed chart bytes. Writing goes through a temp file and
+    os.replace so a half-written cache is never picked up.
+    """
+    st = os.stat(midi_path)
+    digest = _file_digest(midi_path)
+    notes, length = _parse_midi(midi_path)
+    buf = _pack(notes, length, lanes, st.st_mtime_ns, st.st_size, digest)
+
+    out = chart_path(midi_path)
+    tmp = out + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(buf)
+        os.replace(tmp, out)
+    except OSError as e:
+        # read-only map of geblokkeerd bestand: chart werkt dan gewoon in het geheugen
+        print(f"[chart] could not write cache for {midi_path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return buf
+
+
+def _is_fresh(header, midi_path, lanes):
+    st = os.stat(midi_path)
+    if header[2] != lanes:
+        return False
+    if header[3] == st.st_mtime_ns and header[4] == st.st_size:
+        return True
+    # mtime veranderd (bv. na een git checkout) maar inhoud misschien niet
+    return header[4] == st.st_size and header[6] == _file_digest(midi_path)
+
+
+def load_chart(midi_path, lanes=4):
+    """Returns the Chart for a MIDI file, rebuilding the cache when stale."""
+    path = chart_path(midi_path)
+    header = _read_header(path)
+
+    if header is None or not _is_fresh(header, midi_path, lanes):
+        return _unpack(compile_chart(midi_path, lanes))
+
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return _unpack(compile_chart(midi_path, lanes))
+
+    if len(mm) < _DATA_OFFSET + header[7] * 10:
+        # afgekapt bestand
+        mm.close()
+        return _unpack(compile_chart(midi_path, lanes))
+    return _unpack(mm)
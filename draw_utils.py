@@ -1,5 +1,6 @@
 import pygame
 import math
+from collections import OrderedDict
 
 
 def draw_gear(surface, rect, color):
@@ -19,3 +20,109 @@ def draw_gear(surface, rect, color):
     pygame.draw.circle(surface, color, (cx, cy), radius)
     # Inner hole
     pygame.draw.circle(surface, (10, 10, 10), (cx, cy), radius // 2.5)
+
+
+# herbruikbare overlays, een per (grootte, kleur)
+_overlays = {}
+
+
+def get_overlay(size, rgba):
+    """Returns a pooled full-color overlay surface for the given size and RGBA.
+
+    Instead of a fresh SRCALPHA surface per frame this is a plain surface
+    with per-surface alpha, which blends the same and blits faster. The alpha
+    is set on every call, so callers with a changing alpha (fades) share one
+    surface per size and color.
+    """
+    r, g, b, a = rgba
+    key = (tuple(size), (r, g, b))
+    surf = _overlays.get(key)
+    if surf is None:
+        surf = pygame.Surface(size)
+        surf.fill((r, g, b))
+        _overlays[key] = surf
+    surf.set_alpha(a)
+    return surf
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Keyed by (font, text, color, antialias). The returned surfaces are shared,
+    so callers must not draw on them or change their alpha.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        surf = self._surfaces[key] = font.render(text, antialias, color)
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._surfaces),
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+# gedeelde cache voor HUD, menu's en scoreboard
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    return text_cache.render(font, text, color, antialias)
+
+
+class DirtyRects:
+    """Collects the screen regions changed this frame and pushes only those.
+
+    Renderers call `add` with the rects they drew (blit and pygame.draw return
+    them). `present` updates the union of this frame's and last frame's rects,
+    so things that moved or disappeared are cleared too. Anything full-screen
+    (overlays, scene changes) calls `full`, which flips the whole display for
+    this frame and the next one. With enabled=False it always flips.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._rects = []
+        self._prev = []
+        self._full = True
+        self._prev_full = True
+
+    def add(self, rect):
+        if rect:
+            self._rects.append(rect)
+        return rect
+
+    def full(self):
+        self._full = True
+
+    def present(self):
+        if not self.enabled or self._full or self._prev_full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._prev + self._rects)
+        self._prev, self._rects = self._rects, self._prev
+        self._rects.clear()
+        self._prev_full = self._full
+        self._full = False
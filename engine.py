@@ -0,0 +1,175 @@
+"""Headless MIDI Hero: plays a whole song on a virtual clock, without window, audio or camera.
+
+    python engine.py songs/rush-e --difficulty 2 --inputs presses.txt
+    python engine.py songs/rush-e --autoplay --jitter 30 --seed 1
+
+An inputs file has one press per line: "<song time in seconds> <lane>".
+Lines starting with # are skipped. Prints the result as JSON.
+"""
+import os
+import json
+import time
+import random
+import argparse
+
+# stdout is enkel JSON, dus geen pygame welkomstboodschap
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import game_logic
+from chart_cache import load_chart
+from songs import song_from_folder
+
+# zelfde layout en snelheid als main.py, op een virtueel 1920x1080 scherm
+SCREEN_SIZE = (1920, 1080)
+LANES = 4
+LANE_SPACING = 20
+PIXELS_PER_SECOND = 300
+SIM_HZ = 120
+
+
+def read_inputs(path):
+    presses = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                t, lane = line.split()
+                presses.append((float(t), int(lane)))
+            except ValueError:
+                raise ValueError(f"{path}:{n}: expected '<time> <lane>', got {line!r}")
+    presses.sort()
+    return presses
+
+
+def autoplay(judge, jitter_ms=0.0, accuracy=1.0, seed=0):
+    """A press for every playable note at its hit moment, with optional gaussian timing jitter.
+
+    `accuracy` is the chance that a note gets pressed at all.
+    """
+    rng = random.Random(seed)
+    presses = []
+    for lane, times in enumerate(judge.times):
+        for t in times:
+            if rng.random() >= accuracy:
+                continue
+            if jitter_ms:
+                t += rng.gauss(0.0, jitter_ms / 1000.0)
+            presses.append((t, lane))
+    presses.sort()
+    return presses
+
+
+class HeadlessGame:
+    """The game rules of main.py for one song, stepped on a virtual clock.
+
+    Uses the same update_game, HitJudge, press_lane and ScoreKeeper as the
+    real game; song time advances in exact 1/sim_hz steps, so a run only
+    depends on the chart, the difficulty and the presses.
+    """
+
+    def __init__(self, chart, difficulty=1, sim_hz=SIM_HZ, screen_size=SCREEN_SIZE, lanes=LANES):
+        self.chart = chart
+        self.difficulty = difficulty
+        self.dt = 1.0 / sim_hz
+        self.lanes = lanes
+
+        w, h = screen_size
+        self.lane_width = int(w * 0.12)
+        self.lane_left = (w - (self.lane_width * lanes + LANE_SPACING * (lanes - 1))) // 2
+        self.hit_y = int(h * 0.8)
+        self.block_size = game_logic.DIFFICULTY_BLOCK_SIZE[difficulty]
+        self.lead_time = (self.hit_y - self.block_size / 2) / PIXELS_PER_SECOND
+
+        self.scheduler = game_logic.NoteScheduler(chart)
+        self.blocks = game_logic.BlockStore(lanes=lanes)
+        self.judge = game_logic.HitJudge(chart.times, chart.pitches, lanes,
+                                         self.block_size * 1.5 / PIXELS_PER_SECOND, self.lead_time)
+        self.scoring = game_logic.ScoreKeeper()
+        self.miss_window = game_logic.HIT_WINDOWS_MS[difficulty][-1] / 1000.0
+        self.steps = 0
+        self.time = 0.0
+
+    @property
+    def done(self):
+        return self.scheduler.done and not self.blocks and self.time >= self.chart.length
+
+    def press(self, lane, t):
+        # zoals een toets in de event loop van het spel
+        if 0 <= lane < self.lanes:
+            return game_logic.press_lane(lane, t, self.judge, self.blocks, self.scoring, self.difficulty, t)
+        return game_logic.MISS, None
+
+    def slice(self, p1, p2):
+        # een hand beweging in scherm pixels, zoals de camera tak van het spel
+        return game_logic.slice_segment(p1, p2, self.judge, self.blocks, self.scoring, self.difficulty,
+                                        self.lane_left, self.lane_width + LANE_SPACING, self.hit_y)
+
+    def step(self):
+        self.steps += 1
+        # n * dt i.p.v. optellen: geen afrondingsdrift, dus bit voor bit herhaalbaar
+        t = self.time = self.steps * self.dt
+        _, missed = game_logic.update_game(t, self.scheduler, self.blocks, None, 0,
+                                           self.lane_left, self.lane_width, LANE_SPACING,
+                                           self.block_size, self.hit_y, True,
+                                           lanes=self.lanes, pixels_per_second=PIXELS_PER_SECOND,
+                                           playable=self.judge.playable, miss_window=self.miss_window, now=t)
+        if missed:
+            self.scoring.miss(missed)
+
+    def result(self):
+        return {"notes": int(self.judge.playable.sum()), **self.scoring.summary(),
+                "song_time": round(self.time, 3), "steps": self.steps}
+
+    def run(self, presses):
+        """Plays the song to the end with the given (song time, lane) presses; returns the summary."""
+        presses = sorted(presses)
+        p = 0
+        while not self.done:
+            # aanslagen eerst, zoals de event loop in het spel, elk op zijn eigen tijdstip
+            t = (self.steps + 1) * self.dt
+            while p < len(presses) and presses[p][0] <= t:
+                press_time, lane = presses[p]
+                p += 1
+                self.press(lane, press_time)
+            self.step()
+        return self.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a song headless and report the score.")
+    parser.add_argument("song", help="song folder with a .mid file")
+    parser.add_argument("--difficulty", type=int, default=1, choices=sorted(game_logic.DIFFICULTY_BLOCK_SIZE))
+    parser.add_argument("--inputs", help="file with '<time> <lane>' presses")
+    parser.add_argument("--autoplay", action="store_true", help="press every note at its hit moment")
+    parser.add_argument("--jitter", type=float, default=0.0, help="autoplay timing jitter in ms (std dev)")
+    parser.add_argument("--accuracy", type=float, default=1.0, help="autoplay chance to press a note")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sim-hz", type=int, default=SIM_HZ)
+    args = parser.parse_args(argv)
+
+    song = song_from_folder(args.song)
+    t0 = time.perf_counter()
+    chart = load_chart(song["midi"])
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    game = HeadlessGame(chart, args.difficulty, args.sim_hz)
+    presses = []
+    if args.inputs:
+        presses += read_inputs(args.inputs)
+    if args.autoplay:
+        presses += autoplay(game.judge, args.jitter, args.accuracy, args.seed)
+
+    t0 = time.perf_counter()
+    result = game.run(presses)
+    wall = time.perf_counter() - t0
+
+    result = {"song": song["name"], "difficulty": args.difficulty, "presses": len(presses), **result,
+              "load_ms": round(load_ms, 2), "wall_s": round(wall, 3),
+              "realtime_factor": round(result["song_time"] / wall, 1) if wall else None}
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
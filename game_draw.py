@@ -1,6 +1,68 @@
 import pygame
 import time
 import math
+from draw_utils import get_overlay, render_text
+
+JUDGEMENT_COLORS = {
+    "PERFECT": (255, 215, 0),
+    "GREAT": (0, 230, 120),
+    "GOOD": (120, 200, 255),
+    "MISS": (255, 60, 60),
+}
+
+# gecachte statische speelveld laag: (key, surface, laatst getekende surface)
+_playfield = [None, None, None]
+
+
+def _no_mark(*args):
+    pass
+
+
+def _static_playfield(size, background, labels, lane_left, lane_width, LANE_SPACING, hit_y, font_small, use_camera):
+    """Bakes everything that does not move during a song into one surface.
+
+    Rebuilt only when the song background, the resolution or the lane layout
+    changes; every frame then needs a single blit.
+    """
+    key = (size, background, tuple(labels), lane_left, lane_width, LANE_SPACING, hit_y, font_small, use_camera)
+    if _playfield[0] == key:
+        return _playfield[1]
+
+    w, h = size
+    surf = pygame.Surface(size)
+    if background:
+        surf.blit(background, (0, 0))
+    else:
+        surf.fill((0,0,0))
+
+    surf.blit(get_overlay(size, (0, 0, 0, 120)), (0, 0))
+
+    # lanes
+    strip = pygame.Surface((lane_width, h))
+    strip.fill((30, 30, 30))
+    strip.set_alpha(40)
+    for i in range(len(labels)):
+        lx = lane_left + i * (lane_width + LANE_SPACING)
+        lane_rect = pygame.Rect(lx, 0, lane_width, h)
+        surf.blit(strip, (lx, 0))
+        pygame.draw.rect(surf, (200, 200, 200), lane_rect, 4)
+
+    # hit lijn (voor keyboard controls)
+    if not use_camera:
+        pygame.draw.line(surf, (255, 0, 0), (0, hit_y), (w, hit_y), 5)
+
+    # lane labels
+    for i, label in enumerate(labels):
+        lane_cx = lane_left + i * (lane_width + LANE_SPACING) + lane_width // 2
+        t = font_small.render(label, True, (255, 255, 255))
+        r = t.get_rect(center=(lane_cx, hit_y + 40))
+        surf.blit(t, r)
+
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert()
+    _playfield[0] = key
+    _playfield[1] = surf
+    return surf
 
 
 def render_game(screen, 
@@ -28,40 +90,27 @@ def render_game(screen,
                 active_pieces=None, 
                 elapsed=0.0, 
                 song_length=0.0, 
-                score_multiplier=1):
+                score_multiplier=1,
+                dirty=None,
+                sim_alpha=1.0,
+                judgement=None):
     
-    if background:
-        screen.blit(background, (0, 0))
-    else:
-        screen.fill((0,0,0))
-
-    overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 120))
-    screen.blit(overlay, (0, 0))
-
-    # lanes
-    for i in range(len(LANE_LABELS)):
-        lx = lane_left + i * (lane_width + LANE_SPACING)
-        lane_rect = pygame.Rect(lx, 0, lane_width, screen.get_height())
-        strip = pygame.Surface((lane_width, screen.get_height()), pygame.SRCALPHA)
-        strip.fill((30, 30, 30, 40))
-        screen.blit(strip, (lx, 0))
-        pygame.draw.rect(screen, (200, 200, 200), lane_rect, 4)
-
-    # hit lijn (voor keyboard controls)
-    if not use_camera:
-        pygame.draw.line(screen, (255, 0, 0), (0, hit_y), (screen.get_width(), hit_y), 5)
-
-    # lane labels
-    for i, label in enumerate(LANE_LABELS):
-        lane_cx = lane_left + i * (lane_width + LANE_SPACING) + lane_width // 2
-        t = font_small.render(label, True, (255, 255, 255))
-        r = t.get_rect(center=(lane_cx, hit_y + 40))
-        screen.blit(t, r)
+    # dirty rect modus: alles wat we tekenen doorgeven, anders gewoon niets doen
+    mark = dirty.add if dirty is not None else _no_mark
+    full = dirty.full if dirty is not None else _no_mark
+
+    # achtergrond, dimmen, lanes, hit lijn en labels in een keer
+    playfield = _static_playfield(screen.get_size(), background, LANE_LABELS, lane_left, lane_width,
+                                  LANE_SPACING, hit_y, font_small, use_camera)
+    if playfield is not _playfield[2]:
+        # nieuw speelveld: heel het scherm is veranderd
+        _playfield[2] = playfield
+        full()
+    screen.blit(playfield, (0, 0))
 
     # score
-    score_text = font_small.render(f"Score: {score}", True, (255, 255, 0))
-    screen.blit(score_text, (10, 10))
+    score_text = render_text(font_small, f"Score: {score}", (255, 255, 0))
+    mark(screen.blit(score_text, (10, 10)))
 
     # progress bar
     try:
@@ -70,7 +119,7 @@ def render_game(screen,
             bar_w = 18
             bar_y = 60
             bar_h = screen.get_height() - 120
-            pygame.draw.rect(screen, (30, 30, 40), (bar_x, bar_y, bar_w, bar_h), border_radius=6)
+            mark(pygame.draw.rect(screen, (30, 30, 40), (bar_x, bar_y, bar_w, bar_h), border_radius=6))
             frac = max(0.0, min(1.0, elapsed / song_length))
             fill_h = int(bar_h * frac)
 
@@ -79,79 +128,79 @@ def render_game(screen,
 
             # time text
             pct = int(frac * 100)
-            t = font_small.render(f"{pct}%", True, (200,200,200))
-            screen.blit(t, (bar_x + bar_w + 8, bar_y + bar_h - 16))
+            t = render_text(font_small, f"{pct}%", (200,200,200))
+            mark(screen.blit(t, (bar_x + bar_w + 8, bar_y + bar_h - 16)))
 
     except Exception:
         pass
 
     # streak
-    streak_text = font_small.render(f"Streak: {streak}", True, (255, 215, 0))
+    streak_text = render_text(font_small, f"Streak: {streak}", (255, 215, 0))
     sx = screen.get_width() - 10 - streak_text.get_width()
-    screen.blit(streak_text, (sx, 10))
+    mark(screen.blit(streak_text, (sx, 10)))
     # score multiplier
     if score_multiplier and score_multiplier > 1:
         try:
             bx = sx - 60
             by = 8
-            pygame.draw.circle(screen, (0, 180, 120), (bx+18, by+18), 18)
-            bx_txt = font_small.render(f"{int(score_multiplier)}x", True, (20,20,20))
+            mark(pygame.draw.circle(screen, (0, 180, 120), (bx+18, by+18), 18))
+            bx_txt = render_text(font_small, f"{int(score_multiplier)}x", (20,20,20))
             screen.blit(bx_txt, bx_txt.get_rect(center=(bx+18, by+18)))
 
         except Exception:
             pass
 
-    current_time = pygame.time.get_ticks()
-
-    if started and not paused:
-        for block in active_blocks:
-            draw_rect = block["rect"]
-            pygame.draw.rect(screen, block["color"], block["rect"], border_radius=10)
-            if block.get("hit"):
-                elapsed = current_time - block["hit_time"]
-                duration = 300  # Animation lasts 300 milliseconds
-        
-                if elapsed < duration:
-                    # Create a 'Pop' effect using a sine wave (0 to PI)
-                    # This makes it grow and then shrink back to normal size
-                    # math.sin(0) = 0, math.sin(pi) = 0, math.sin(pi/2) = 1 (peak)
-                    timer_ratio = (elapsed / duration) * math.pi
-                    pulse_size = math.sin(timer_ratio) * 20  # Grows up to 20 pixels
-                    draw_rect = block["rect"].inflate(pulse_size, pulse_size)
-                else:
-                # Optional: Remove block or keep it green but stop pulsing
-                    pass
-                pygame.draw.rect(screen, block["color"], draw_rect, border_radius=10)
-            
-
-    else:
-        for block in active_blocks:
-            pygame.draw.rect(screen, block["color"], block["rect"], border_radius=10)
-
+    # blokken rechtstreeks uit de kolommen van de block store, y op het render moment (draw_y)
+    now = time.time()
+    blocks = active_blocks
+    animate = started and not paused
+    hit_state = blocks.HIT
+    draw_rect = pygame.Rect(0, 0, 0, 0)  # een rect hergebruiken voor alle blokken
+
+    # kolommen via scratch buffers van de store, enkel de python lijsten voor pygame zijn nieuw
+    for x, y, w, h, state, hit_time, color_idx in zip(*blocks.draw_rows()):
+        draw_rect.update(x, y, w, h)
+        if state == hit_state:
+            color = (0, 255, 0)  # groen op hit
+            elapsed_ms = (now - hit_time) * 1000
+            duration = 300  # Animation lasts 300 milliseconds
+
+            if animate and elapsed_ms < duration:
+                # Create a 'Pop' effect using a sine wave (0 to PI)
+                # This makes it grow and then shrink back to normal size
+                # math.sin(0) = 0, math.sin(pi) = 0, math.sin(pi/2) = 1 (peak)
+                timer_ratio = (elapsed_ms / duration) * math.pi
+                pulse_size = math.sin(timer_ratio) * 20  # Grows up to 20 pixels
+                draw_rect.inflate_ip(pulse_size, pulse_size)
+        else:
+            color = BLOCK_COLORS[color_idx]
+        mark(pygame.draw.rect(screen, color, draw_rect, border_radius=10))
 
     if active_pieces:
-        for p in list(active_pieces):
-            try:
-                pygame.draw.rect(screen, p.get("color", (255,255,255)), p["rect"], border_radius=6)
-            except Exception:
-                pass
+        active_pieces.draw(screen, mark, sim_alpha)
+
+    # PERFECT/GREAT/GOOD/MISS van de laatste aanslag, even boven de hit lijn
+    if judgement is not None and now - judgement[1] < 0.5:
+        color = JUDGEMENT_COLORS.get(judgement[0], (255, 255, 255))
+        text = render_text(font_big, judgement[0], color)
+        center_x = lane_left + (len(LANE_LABELS) * (lane_width + LANE_SPACING) - LANE_SPACING) // 2
+        mark(screen.blit(text, text.get_rect(center=(center_x, hit_y - 120))))
 
     if not started:
-        msg = font_big.render("Press SPACE to Start", True, (255, 255, 255))
-        screen.blit(msg, msg.get_rect(center=screen.get_rect().center))
+        msg = render_text(font_big, "Press SPACE to Start", (255, 255, 255))
+        mark(screen.blit(msg, msg.get_rect(center=screen.get_rect().center)))
 
     if paused:
-        fade = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        fade.fill((0, 0, 0, 180))
-        screen.blit(fade, (0, 0))
+        full()
+        screen.blit(get_overlay(screen.get_size(), (0, 0, 0, 180)), (0, 0))
 
         cx = screen.get_rect().centerx
         top_y = 80
-        paused_text = font_big.render("PAUSED", True, (255, 255, 255))
+        paused_text = render_text(font_big, "PAUSED", (255, 255, 255))
         screen.blit(paused_text, paused_text.get_rect(center=(cx, top_y)))
 
         hint_y = top_y + 60
-        hint = font_small.render("Press ESC to resume", True, (200, 200, 200))
+        hint = render_text(font_small, "Press ESC to resume", (200, 200, 200))
         screen.blit(hint, hint.get_rect(center=(cx, hint_y)))
 
         # settings knoppekes
@@ -166,7 +215,7 @@ def render_game(screen,
         # back to main menu
         back_color = (90, 90, 90) if pause_button_selected != 0 else (120, 120, 60)
         pygame.draw.rect(screen, back_color, back_rect, border_radius=8)
-        back_txt = font_small.render("Main Menu", True, (255, 255, 255))
+        back_txt = render_text(font_small, "Main Menu", (255, 255, 255))
         screen.blit(back_txt, back_txt.get_rect(center=back_rect.center))
         
         if pause_button_selected == 0:
@@ -176,7 +225,7 @@ def render_game(screen,
         # settings
         settings_color = (80, 100, 140) if pause_button_selected == 1 else (90, 90, 90)
         pygame.draw.rect(screen, settings_color, settings_rect, border_radius=8)
-        set_txt = font_small.render("Settings", True, (255, 255, 255))
+        set_txt = render_text(font_small, "Settings", (255, 255, 255))
         screen.blit(set_txt, set_txt.get_rect(center=settings_rect.center))
 
         if pause_button_selected == 1:
@@ -186,7 +235,7 @@ def render_game(screen,
         # exit game
         exit_color = (180, 70, 70) if pause_button_selected != 2 else (220, 90, 90)
         pygame.draw.rect(screen, exit_color, exit_rect, border_radius=8)
-        exit_text = font_small.render("Exit Game", True, (255, 255, 255))
+        exit_text = render_text(font_small, "Exit Game", (255, 255, 255))
         screen.blit(exit_text, exit_text.get_rect(center=exit_rect.center))
 
         if pause_button_selected == 2:
@@ -194,9 +243,8 @@ def render_game(screen,
             pygame.draw.rect(screen, (255, 215, 0), outline_rect, 4, border_radius=12)
 
     if error_flash > 0:
-        border = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        border.fill((255, 0, 0, 50))
-        screen.blit(border, (0, 0))
+        full()
+        screen.blit(get_overlay(screen.get_size(), (255, 0, 0, 50)), (0, 0))
 
 
     # scoreboard overlay registration
@@ -217,10 +265,10 @@ def render_game(screen,
                 thumb_w, thumb_h = 160, 120
                 surf = pygame.image.frombuffer(preview_frame.tobytes(), (pw, ph), 'RGB')
                 surf = pygame.transform.scale(surf, (thumb_w, thumb_h))
-                pygame.draw.rect(screen, (30,30,30), (10, 40, thumb_w+4, thumb_h+4))
+                mark(pygame.draw.rect(screen, (30,30,30), (10, 40, thumb_w+4, thumb_h+4)))
                 screen.blit(surf, (12, 42))
-                t = font_small.render("Camera Preview", True, (200,200,200))
-                screen.blit(t, (12, 16))
+                t = render_text(font_small, "Camera Preview", (200,200,200))
+                mark(screen.blit(t, (12, 16)))
 
             except Exception:
                 pass
@@ -229,8 +277,8 @@ def render_game(screen,
         # pointers waar handen zijn op camera
         if hand_positions:
             for (hx, hy) in hand_positions:
-                pygame.draw.circle(screen, (255, 200, 0), (int(hx), int(hy)), 14, 3)
+                mark(pygame.draw.circle(screen, (255, 200, 0), (int(hx), int(hy)), 14, 3))
                 pygame.draw.circle(screen, (255, 200, 0, 80), (int(hx), int(hy)), 6)
 
-        hint = font_small.render("Camera: slice the blocks with your index finger", True, (200, 200, 200))
-        screen.blit(hint, hint.get_rect(center=(screen.get_width()//2, hit_y - 80)))
+        hint = render_text(font_small, "Camera: slice the blocks with your index finger", (200, 200, 200))
+        mark(screen.blit(hint, hint.get_rect(center=(screen.get_width()//2, hit_y - 80))))
@@ -1,10 +1,558 @@
 import pygame
 import time
 import threading
+from bisect import bisect_left
+from collections import deque
+import numpy as np
+
+
+class NoteScheduler:
+    """Read cursor over the time-sorted notes of a chart.
+
+    Notes are handed out once, in order, as soon as their time has come, so the
+    per-frame cost only depends on how many notes are due, not on song length.
+    """
+
+    def __init__(self, chart):
+        self.times = chart.times
+        self.pitches = chart.pitches
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def due(self, elapsed):
+        # geeft de indices van alle noten die nu moeten verschijnen
+        times = self.times
+        start = i = self.cursor
+        end = len(times)
+        while i < end and times[i] <= elapsed:
+            i += 1
+        self.cursor = i
+        return range(start, i)
+
+    @property
+    def done(self):
+        return self.cursor >= len(self.times)
+
+    def reset(self):
+        self.cursor = 0
+
+
+# timing vensters in ms rond het moment dat een noot de hit lijn kruist, per moeilijkheid: (perfect, great, good)
+HIT_WINDOWS_MS = {
+    1: (50, 100, 160),
+    2: (40, 80, 130),
+    3: (30, 60, 100),
+}
+JUDGEMENTS = ("PERFECT", "GREAT", "GOOD")
+MISS = "MISS"
+JUDGEMENT_POINTS = {"PERFECT": 100, "GREAT": 70, "GOOD": 40}
+
+# blok hoogte (MOEILIJKHEID) en score bonus per moeilijkheid
+DIFFICULTY_BLOCK_SIZE = {1: 100, 2: 75, 3: 50}
+DIFFICULTY_MULTIPLIER = {1: 1.0, 2: 1.25, 3: 1.5}
+# (streak, multiplier), hoogste eerst
+STREAK_MULTIPLIERS = ((250, 5), (100, 3), (25, 2))
+CAMERA_STREAK_MULTIPLIERS = ((50, 3), (25, 2))
+SLICE_POINTS = 100
+WRONG_PRESS_PENALTY = 20
+
+
+class ScoreKeeper:
+    """Score, streak and multiplier rules, shared by the game and the headless engine."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.score = 0
+        self.streak = 0
+        self.best_streak = 0
+        self.multiplier = 1
+        self.misses = 0          # noten die voorbij de hit lijn gingen
+        self.wrong_presses = 0   # aanslagen zonder noot in het venster
+        self.judgements = dict.fromkeys(JUDGEMENTS, 0)
+
+    def hit(self, points, difficulty, multipliers=STREAK_MULTIPLIERS, judgement=None):
+        # eerst punten met de huidige multiplier, dan pas de streak verhogen
+        self.score += int(points * self.multiplier * DIFFICULTY_MULTIPLIER[difficulty])
+        self.streak += 1
+        self.best_streak = max(self.best_streak, self.streak)
+        for streak, multiplier in multipliers:
+            if self.streak >= streak:
+                self.multiplier = max(self.multiplier, multiplier)
+                break
+        if judgement is not None:
+            self.judgements[judgement] += 1
+
+    def miss(self, count=1):
+        self.misses += count
+        self.streak = 0
+        self.multiplier = 1
+
+    def wrong_press(self):
+        self.wrong_presses += 1
+        self.streak = 0
+        self.multiplier = 1
+        self.score -= WRONG_PRESS_PENALTY
+
+    def summary(self):
+        return {"score": self.score, "best_streak": self.best_streak, "misses": self.misses,
+                "wrong_presses": self.wrong_presses, **{k.lower(): v for k, v in self.judgements.items()}}
+
+
+def playable_notes(times, pitches, lanes, min_gap):
+    """Mask of the chart notes that become blocks.
+
+    A note closer than min_gap seconds to the previous block in its lane
+    would overlap it and is dropped. Decided once per song, so spawning and
+    hit judgement agree on which notes exist.
+    """
+    keep = np.zeros(len(times), bool)
+    last = [None] * lanes
+    for i, (t, pitch) in enumerate(zip(times, pitches)):
+        lane = pitch % lanes
+        if last[lane] is not None and t - last[lane] < min_gap:
+            continue
+        keep[i] = True
+        last[lane] = t
+    return keep
+
+
+class HitJudge:
+    """Judges lane presses by song time against the time-sorted chart.
+
+    Per lane the hit moments (note time + lead_time, when the block is
+    centered on the hit line) of the playable notes sit in a sorted list. A
+    press looks up the nearest unjudged note with a binary search and rates
+    the time offset with the difficulty's ms windows, so the outcome does not
+    depend on frame rate, block size or resolution.
+    """
+
+    def __init__(self, times, pitches, lanes, min_gap, lead_time):
+        self.playable = playable_notes(times, pitches, lanes, min_gap)
+        self.lead_time = lead_time
+        self.notes = [[] for _ in range(lanes)]  # per lane: chart indices
+        self.times = [[] for _ in range(lanes)]  # per lane: hit momenten, gesorteerd
+        for i in np.flatnonzero(self.playable).tolist():
+            lane = pitches[i] % lanes
+            self.notes[lane].append(i)
+            self.times[lane].append(times[i] + lead_time)
+        self.judged = np.zeros(len(times), bool)
+
+    def reset(self):
+        self.judged[:] = False
+
+    def mark(self, note_index):
+        # noot is op een andere manier afgehandeld (bv. camera slice)
+        self.judged[note_index] = True
+
+    def judge(self, lane, t, windows_ms):
+        """Rates a press in `lane` at song time `t`.
+
+        Returns (judgement, note_index, offset in seconds); note_index and
+        offset are None for a MISS (no unjudged note within the good window).
+        """
+        good = windows_ms[-1] / 1000.0
+        times = self.times[lane]
+        notes = self.notes[lane]
+        judged = self.judged
+        i = bisect_left(times, t)
+
+        # vanaf het insert punt de eerste onbeoordeelde noot links en rechts zoeken
+        best = None
+        j = i - 1
+        while j >= 0 and t - times[j] <= good:
+            if not judged[notes[j]]:
+                best = j
+                break
+            j -= 1
+        j = i
+        while j < len(times) and times[j] - t <= good:
+            if not judged[notes[j]]:
+                if best is None or times[j] - t < t - times[best]:
+                    best = j
+                break
+            j += 1
+        if best is None:
+            return MISS, None, None
+
+        note = notes[best]
+        judged[note] = True
+        offset = t - times[best]
+        for name, window in zip(JUDGEMENTS[:-1], windows_ms):
+            if abs(offset) <= window / 1000.0:
+                return name, note, offset
+        # de noot ligt binnen het good venster, anders was ze hierboven niet gekozen
+        return JUDGEMENTS[-1], note, offset
+
+
+def press_lane(lane, t, judge, active_blocks, scoring, difficulty, now):
+    """One lane press at song time `t`: judge it, update the block and the score.
+
+    Returns (judgement, slot); slot is None when the press was a MISS.
+    """
+    judgement, note, offset = judge.judge(lane, t, HIT_WINDOWS_MS[difficulty])
+    slot = active_blocks.slot_for_note(lane, note) if judgement != MISS else None
+    if slot is None:
+        scoring.wrong_press()
+        return MISS, None
+    active_blocks.mark_hit(slot, now)
+    scoring.hit(JUDGEMENT_POINTS[judgement], difficulty, judgement=judgement)
+    return judgement, slot
+
+
+def slice_segment(p1, p2, judge, active_blocks, scoring, difficulty, lane_left, lane_pitch, max_y):
+    """One hand movement p1-p2 slices the first pending block it crosses.
+
+    One block per movement, like before the batched test. Returns a list with
+    (rect, color index) of the removed block, empty when nothing was hit.
+    """
+    removed = []
+    for slot in active_blocks.sliced(p1, p2, lane_left, lane_pitch, max_y)[:1].tolist():
+        removed.append((active_blocks.rect(slot), int(active_blocks.color[slot])))
+        judge.mark(int(active_blocks.note[slot]))
+        active_blocks.remove(slot)
+        scoring.hit(SLICE_POINTS, difficulty, CAMERA_STREAK_MULTIPLIERS)
+    return removed
+
+
+class FixedTimestep:
+    """Accumulator for a fixed-rate simulation running under a free render rate.
+
+    Each frame `steps(target)` yields the simulation times to step to, `dt`
+    apart, until the simulation has caught up with `target` (the song time).
+    `alpha` tells the renderer how far it is between the last two steps.
+    """
+
+    def __init__(self, hz=120, max_steps=8):
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps  # meer stappen per frame = inhalen na een hapering, niet eindeloos
+        self.tick = 0  # aantal stappen sinds de start; time = tick * dt, net als in de headless engine
+        self.time = 0.0
+        self.alpha = 0.0
+
+    def reset(self, t=0.0):
+        self.tick = int(t / self.dt)
+        self.time = self.tick * self.dt
+        self.alpha = 0.0
+
+    def steps(self, target):
+        if target < self.time:
+            # klok sprong terug: nieuw liedje of herstart
+            self.reset(target)
+        dt = self.dt
+        n = 0
+        # tick * dt i.p.v. optellen: geen afrondingsdrift, zelfde stap tijden als een replay
+        while (self.tick + 1) * dt <= target:
+            if n == self.max_steps:
+                # te ver achter: de rest overslaan, posities volgen toch uit de tijd
+                self.tick = int(target / dt) - 1
+            self.tick += 1
+            self.time = self.tick * dt
+            n += 1
+            yield self.time
+        self.alpha = (target - self.time) / dt
+
+    @property
+    def render_time(self):
+        # tussen de vorige en de laatste stap, zoals de renderer ze interpoleert
+        return self.time - self.dt + self.alpha * self.dt
+
+
+class BlockStore:
+    """Struct-of-arrays store for the active note blocks.
+
+    Every block is a slot in a set of NumPy columns (note time, lane, state,
+    hit/miss time, geometry, color). `update` moves all blocks, finds new
+    misses and expires faded blocks in one vectorized pass; the renderer
+    reads the same columns. Per lane a deque holds the pending slots in
+    note-time order, so the block closest to the hit line is its head.
+    """
+
+    FREE, PENDING, HIT, MISSED = 0, 1, 2, 3
+    FADE_SECONDS = 1.0
+
+    COLUMNS = {
+        "time": np.float64,
+        "hit_time": np.float64,
+        "miss_time": np.float64,
+        "lane": np.int8,
+        "state": np.uint8,
+        "color": np.uint8,
+        "x": np.int32,
+        "y": np.int32,
+        "w": np.int32,
+        "h": np.int32,
+        "note": np.int32,
+    }
+
+    def __init__(self, capacity=256, lanes=4):
+        self.lanes = [deque() for _ in range(lanes)]
+        self.count = 0
+        self.grows = 0  # aantal keer dat de pool moest groeien, hoort tijdens een liedje 0 te blijven
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype))
+        self._alloc_buffers(capacity)
+        # vrije slots als stack, laagste index bovenaan
+        self.free = list(range(capacity - 1, -1, -1))
+
+    # kolommen die de renderer per blok nodig heeft, in deze volgorde (y = draw_y)
+    DRAW_COLUMNS = ("x", "draw_y", "w", "h", "state", "hit_time", "color")
+
+    def _alloc_buffers(self, capacity):
+        # scratch buffers voor update, place en de renderer, zodat die per frame geen arrays alloceren
+        self._y_buf = np.zeros(capacity, np.float64)
+        self._mask = np.zeros(capacity, bool)
+        self._mask2 = np.zeros(capacity, bool)
+        self._index = np.arange(capacity, dtype=np.intp)
+        self._slots = np.zeros(capacity, np.intp)
+        self.draw_y = np.zeros(capacity, np.int32)
+        self._draw_bufs = {name: np.zeros(capacity, getattr(self, name).dtype) for name in self.DRAW_COLUMNS}
+
+    def _resize(self, capacity):
+        n = len(self.state)
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            arr = np.zeros(capacity, old.dtype)
+            arr[:n] = old
+            setattr(self, name, arr)
+        self._alloc_buffers(capacity)
+        self.free[:0] = range(capacity - 1, n - 1, -1)
+
+    def _grow(self):
+        self.grows += 1
+        self._resize(len(self.state) * 2)
+
+    def reserve(self, capacity):
+        """Grows the pool up front to at least `capacity` slots (not counted in `grows`)."""
+        if capacity > len(self.state):
+            self._resize(capacity)
+
+    @property
+    def capacity(self):
+        return len(self.state)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        for q in self.lanes:
+            q.clear()
+        self.state[:] = self.FREE
+        self.free = list(range(len(self.state) - 1, -1, -1))
+        self.count = 0
+
+    def spawn(self, note_time, lane, x, w, h, color_idx, note_index=-1):
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.time[slot] = note_time
+        self.lane[slot] = lane
+        self.state[slot] = self.PENDING
+        self.color[slot] = color_idx
+        self.x[slot] = x
+        self.y[slot] = 0
+        self.w[slot] = w
+        self.h[slot] = h
+        self.note[slot] = note_index
+        self.lanes[lane].append(slot)
+        self.count += 1
+        return slot
+
+    def remove(self, slot):
+        if self.state[slot] == self.PENDING:
+            self.lanes[self.lane[slot]].remove(slot)
+        self.state[slot] = self.FREE
+        self.free.append(slot)
+        self.count -= 1
+
+    def slot_for_note(self, lane, note_index):
+        # pending blok van deze noot, None als het al gemist of weg is
+        note = self.note
+        for slot in self.lanes[lane]:
+            if note[slot] == note_index:
+                return slot
+        return None
+
+    def mark_hit(self, slot, now):
+        self.lanes[self.lane[slot]].remove(slot)
+        self.state[slot] = self.HIT
+        self.hit_time[slot] = now
+
+    def _select(self, mask):
+        # indices van mask in de scratch buffer i.p.v. een nieuwe array (flatnonzero)
+        n = int(np.count_nonzero(mask))
+        out = self._slots[:n]
+        np.compress(mask, self._index, out=out)
+        return out
+
+    def live_slots(self):
+        """Slots in use, as a view into a scratch buffer: only valid until the next call."""
+        return self._select(np.not_equal(self.state, self.FREE, out=self._mask))
+
+    def draw_rows(self):
+        """Per DRAW_COLUMNS column a list with the values of the live blocks, for the renderer."""
+        live = self.live_slots()
+        n = len(live)
+        return [np.take(getattr(self, name), live, out=self._draw_bufs[name][:n]).tolist()
+                for name in self.DRAW_COLUMNS]
+
+    def sliced(self, p1, p2, lane_left, lane_pitch, max_y):
+        """Pending slots whose rect the segment p1-p2 crosses, in one vectorized pass.
+
+        Only blocks in the lanes the segment spans and at or above max_y (the
+        hit line) are tested. Sorted in the order the segment enters them.
+        """
+        lo = int((min(p1[0], p2[0]) - lane_left) // lane_pitch)
+        hi = int((max(p1[0], p2[0]) - lane_left) // lane_pitch)
+        if hi < 0 or lo >= len(self.lanes):
+            return np.empty(0, np.intp)
+
+        lane = self.lane
+        candidates = np.flatnonzero((self.state == self.PENDING) & (lane >= lo) & (lane <= hi) & (self.y <= max_y))
+        if not len(candidates):
+            return candidates
+        hit, entry = segment_entry(p1, p2, self.x[candidates], self.y[candidates],
+                                   self.w[candidates], self.h[candidates])
+        return candidates[hit][np.argsort(entry[hit], kind="stable")]
+
+    def rect(self, slot):
+        return pygame.Rect(int(self.x[slot]), int(self.y[slot]), int(self.w[slot]), int(self.h[slot]))
+
+    def place(self, elapsed, pixels_per_second, out=None):
+        """Block y positions at `elapsed`; by default into `draw_y`, for rendering between steps."""
+        if out is None:
+            out = self.draw_y
+        y_buf = self._y_buf
+        np.subtract(elapsed, self.time, out=y_buf)
+        y_buf *= pixels_per_second
+        np.maximum(y_buf, 0, out=y_buf)
+        out[:] = y_buf
+        return out
+
+    def update(self, elapsed, pixels_per_second, miss_threshold, now):
+        """Moves every block and handles misses/expiry; returns the new miss count."""
+        state = self.state
+        y_buf = self._y_buf
+        self.place(elapsed, pixels_per_second, self.y)
+
+        missed = np.equal(state, self.PENDING, out=self._mask)
+        # y is int32: tegen een geheel getal vergelijken, een float drempel kost een cast buffer per stap
+        missed &= np.greater(self.y, int(miss_threshold // 1), out=self._mask2)
+        n_missed = int(np.count_nonzero(missed))
+        if n_missed:
+            np.copyto(self.miss_time, now, where=missed)
+            np.copyto(state, self.MISSED, where=missed)
+            # gemiste blokken zijn altijd de oudste van hun lane, dus de kop
+            for q in self.lanes:
+                while q and state[q[0]] == self.MISSED:
+                    q.popleft()
+
+        # fade start: hit_time voor HIT, miss_time voor MISSED
+        fade = y_buf
+        np.copyto(fade, self.miss_time)
+        np.copyto(fade, self.hit_time, where=np.equal(state, self.HIT, out=self._mask))
+        np.subtract(now, fade, out=fade)
+        expired = np.greater_equal(state, self.HIT, out=self._mask)  # HIT of MISSED
+        expired &= np.greater(fade, self.FADE_SECONDS, out=self._mask2)
+        if np.count_nonzero(expired):
+            np.copyto(state, self.FREE, where=expired)
+            slots = self._select(expired)
+            self.free.extend(slots.tolist())
+            self.count -= len(slots)
+
+        return n_missed
+
+
+def peak_notes_in_window(times, seconds):
+    """Most notes within any `seconds`-long window of the sorted note times (end inclusive).
+
+    With a block's lifetime as window this is the most blocks that can be on
+    screen at once, used to size the BlockStore before a song starts; notes
+    skipped for overlapping only make the real number lower. With 1 second
+    it is the peak notes per second in the song list.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if not len(times):
+        return 0
+    return int((np.searchsorted(times, times + seconds, side="right") - np.arange(len(times))).max())
+
+
+def seg_intersects_rect(p1, p2, rect):
+    """Scalar segment-vs-rect test for a single pygame.Rect (edges inclusive)."""
+    if rect.collidepoint(p1) or rect.collidepoint(p2):
+        return True
+
+    # helper for segment intersection
+    def _orient(a, b, c):
+        return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0])
+
+    def _on_segment(a, b, c):
+        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+    a = p1; b = p2
+    # rectangle corners
+    rx1, ry1 = rect.topleft
+    rx2, ry2 = rect.topright
+    rx3, ry3 = rect.bottomright
+    rx4, ry4 = rect.bottomleft
+    edges = [((rx1, ry1), (rx2, ry2)), ((rx2, ry2), (rx3, ry3)),
+             ((rx3, ry3), (rx4, ry4)), ((rx4, ry4), (rx1, ry1))]
+
+    for (c, d) in edges:
+        o1 = _orient(a, b, c)
+        o2 = _orient(a, b, d)
+        o3 = _orient(c, d, a)
+        o4 = _orient(c, d, b)
+
+        if o1 == 0 and _on_segment(a, b, c):
+            return True
+        if o2 == 0 and _on_segment(a, b, d):
+            return True
+        if o3 == 0 and _on_segment(c, d, a):
+            return True
+        if o4 == 0 and _on_segment(c, d, b):
+            return True
+
+        if (o1 > 0) != (o2 > 0) and (o3 > 0) != (o4 > 0):
+            return True
+
+    return False
+
+
+def segment_hits(p1, p2, xs, ys, ws, hs):
+    """Boolean mask of the rects (x, y, w, h arrays) that the segment p1-p2 touches.
+
+    Liang-Barsky clipping against all rects at once; rect edges count as
+    inside, like seg_intersects_rect.
+    """
+    return segment_entry(p1, p2, xs, ys, ws, hs)[0]
+
+
+def segment_entry(p1, p2, xs, ys, ws, hs):
+    """Like segment_hits, plus where the segment enters each rect (0 = at p1, 1 = at p2)."""
+    x1, y1 = float(p1[0]), float(p1[1])
+    dx, dy = float(p2[0]) - x1, float(p2[1]) - y1
+    t0 = np.zeros(len(xs))
+    t1 = np.ones(len(xs))
+    ok = np.ones(len(xs), bool)
+
+    for p, q in ((-dx, x1 - xs), (dx, xs + ws - x1), (-dy, y1 - ys), (dy, ys + hs - y1)):
+        if p == 0:
+            # evenwijdig met deze rand: moet binnen de strook liggen
+            ok &= q >= 0
+        elif p < 0:
+            np.maximum(t0, q / p, out=t0)
+        else:
+            np.minimum(t1, q / p, out=t1)
+
+    return ok & (t0 <= t1), t0
 
 
 def update_game(elapsed, 
-                notes, 
+                scheduler, 
                 active_blocks, 
                 BLOCK_COLORS, 
                 current_color_idx,
@@ -15,96 +563,33 @@ def update_game(elapsed,
                 hit_y,
                 music_started, 
                 lanes=4, 
-                pixels_per_second=300):
+                pixels_per_second=300,
+                *,
+                playable,
+                miss_window=None,
+                now=None):
 
     # tijdgebonden noten ipv fps
-    for n in notes:
-        if n.get("spawned"):
-            continue
-        
-        if n["time"] <= elapsed:
-            lane = n["note"] % lanes
-            lane_x = lane_left + lane * (lane_width + LANE_SPACING)
-            y = max(0, (elapsed - n["time"]) * pixels_per_second)
-            rect = pygame.Rect(lane_x + 10, int(y), lane_width - 20, MOEILIJKHEID)
-            overlap = False
-
-            for b in active_blocks:
-                b_lane = int((b["rect"].centerx - lane_left) // (lane_width + LANE_SPACING))
-                if b_lane == lane and abs(b["rect"].y - rect.y) < (MOEILIJKHEID * 1.5):
-                    overlap = True
-                    break
-
-            if not overlap:
-                active_blocks.append({"rect": rect, "hit": False, "hit_time": pygame.time.get_ticks(), "color": BLOCK_COLORS[current_color_idx], "time": n["time"]})
-                n["spawned"] = True
-
-    # update blok posities
-    for block in active_blocks:
-        block_time = block.get("time", 0)
-        block["rect"].y = int(max(0, (elapsed - block_time) * pixels_per_second))
-
-    # noten in lijst registeren (ivm streak etc)
-    # werkt niet :(
-    miss_threshold = hit_y + int(MOEILIJKHEID * 1.5)
-    kept = []
-    missed_count = 0
-
-
-    #for block in active_blocks:
-    #    if block.get("hit"):
-    #        kept.append(block)
-#
-    #    else:
-    #        if block["rect"].top <= miss_threshold:
-    #            kept.append(block)
-#
-    #        else:
-    #            missed_count += 1
-    #            if block in active_blocks:
-    #                threading.Timer(1, active_blocks.remove, args=[block]).start()
-    #            
-
-
-
-    current_time = time.time()
-    kept = []
-
-    for block in active_blocks:
-        # --- 1. Handle blocks that are already "dying" (missed previously) ---
-        if block.get("is_missed"):
-            # If 1 second has passed since it was missed, let it go (don't append to kept)
-            if current_time - block["miss_time"] > 1.0:
-                continue 
-            
-            # Otherwise, keep it alive so it renders
-            kept.append(block)
-            continue
+    for i in scheduler.due(elapsed):
+        note_time = scheduler.times[i]
+        lane = scheduler.pitches[i] % lanes
 
-        # --- 2. Handle active blocks ---
-        if block.get("hit"):
-            kept.append(block)
+        # noten die overlappen met het vorige blok in dezelfde lane worden overgeslagen,
+        # playable komt van playable_notes (HitJudge.playable), zelfde lijst als de judge gebruikt
+        if not playable[i]:
+            continue
 
-        else:
-            # Check if it just crossed the line
-            if block["rect"].top <= miss_threshold:
-                kept.append(block)
-
-            else:
-                # It just missed!
-                missed_count += 1
-
-                # Mark it, timestamp it, and KEEP it so it stays visible
-                block["is_missed"] = True
-                block["miss_time"] = current_time
-                kept.append(block)
-
-    # Update the main list
-    active_blocks = kept
-    
-    # wat doet dit uberhaupt bruh
-    old_len = len(active_blocks)
-    active_blocks[:] = kept
+        lane_x = lane_left + lane * (lane_width + LANE_SPACING)
+        active_blocks.spawn(note_time, lane, lane_x + 10, lane_width - 20, MOEILIJKHEID, current_color_idx, i)
 
+    # update blok posities, gemiste blokken blijven nog even zichtbaar voor ze verdwijnen
+    if miss_window is not None:
+        # gemist zodra het good venster voorbij is: blok midden miss_window seconden onder de hit lijn
+        miss_threshold = hit_y - MOEILIJKHEID / 2 + miss_window * pixels_per_second
+    else:
+        miss_threshold = hit_y + int(MOEILIJKHEID * 1.5)
+    # now: klok voor het uitfaden, de wall clock in het spel of de virtuele klok headless
+    missed_count = active_blocks.update(elapsed, pixels_per_second, miss_threshold,
+                                        time.time() if now is None else now)
 
     return music_started, missed_count
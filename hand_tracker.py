@@ -0,0 +1,236 @@
+import sys
+import time
+import threading
+import cv2
+
+
+def create_hands(model_complexity=1, max_num_hands=2):
+    """Builds the MediaPipe Hands model; model_complexity 0 is the fast/light one."""
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(static_image_mode=False,
+                                    model_complexity=model_complexity,
+                                    max_num_hands=max_num_hands,
+                                    min_detection_confidence=0.5,
+                                    min_tracking_confidence=0.5)
+
+
+def lane_roi(lane_left, lane_right, screen_w, margin=0.05):
+    """Normalized (x0, y0, x1, y1) screen region that matters for slicing.
+
+    The lanes horizontally plus a margin, over the full height: below the
+    hit line there is nothing to slice, but the palm detector needs the
+    palm and wrist, which hang under the fingertip.
+    """
+    x0 = max(0.0, lane_left / screen_w - margin)
+    x1 = min(1.0, lane_right / screen_w + margin)
+    return (x0, 0.0, x1, 1.0)
+
+
+def prepare_frame(frame, scale=1.0, roi=None, inverted=False):
+    """Crops a BGR camera frame to the roi and downscales it for inference.
+
+    `roi` is in screen coordinates; with `inverted` the screen is the mirror
+    image of the camera, so the crop is mirrored too. Returns the RGB image
+    and the (x0, y0, x1, y1) camera region it covers.
+    """
+    h, w = frame.shape[:2]
+    region = (0.0, 0.0, 1.0, 1.0)
+    if roi is not None:
+        x0, y0, x1, y1 = roi
+        if inverted:
+            x0, x1 = 1.0 - x1, 1.0 - x0
+        region = (x0, y0, x1, y1)
+        frame = frame[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)]
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), region
+
+
+class HandSample:
+    """One processed camera frame: index finger tips in normalized coordinates."""
+
+    __slots__ = ("seq", "timestamp", "tips", "preview", "infer_ms")
+
+    def __init__(self, seq, timestamp, tips, preview, infer_ms=0.0):
+        self.seq = seq
+        self.timestamp = timestamp  # perf_counter op het moment van capture
+        self.tips = tips            # [(x, y), ...] in 0..1, al gespiegeld als inverted
+        self.preview = preview      # RGB frame voor de camera preview
+        self.infer_ms = infer_ms    # duur van prepare + hands.process
+
+
+class HandTracker:
+    """Runs camera capture and MediaPipe hand inference on a worker thread.
+
+    Results land in a latest-value mailbox: the game loop calls `latest()`
+    every frame and gets the newest sample without ever waiting on the camera
+    or the model. Older samples that were never read are simply overwritten.
+    """
+
+    def __init__(self, cap, hands, scale=1.0, rate_hz=0):
+        self.cap = cap
+        self.hands = hands
+        self.inverted = False
+        self.scale = scale      # downscale factor voor de inference
+        self.roi = None         # (x0, y0, x1, y1) in scherm coordinaten, None = heel het frame
+        self.rate_hz = rate_hz  # max aantal inferences per seconde, 0 = zo snel als de camera
+        self._active = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._seq = 0
+        self._thread = threading.Thread(target=self._run, name="hand-tracker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def set_active(self, active):
+        # enkel capturen tijdens het spelen, anders slaapt de worker
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def stop(self):
+        self._stop.set()
+        self._active.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        next_at = 0.0
+        while not self._stop.is_set():
+            if not self._active.wait(timeout=0.1):
+                continue
+
+            if self.rate_hz:
+                # frames tussen twee inferences enkel grabben, zodat de buffer niet achterloopt
+                if time.perf_counter() < next_at:
+                    self.cap.grab()
+                    continue
+                next_at = time.perf_counter() + 1.0 / self.rate_hz
+
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.005)
+                continue
+            captured = time.perf_counter()
+            inverted = self.inverted
+
+            image, (x0, y0, x1, y1) = prepare_frame(frame, self.scale, self.roi, inverted)
+            try:
+                results = self.hands.process(image)
+            except Exception as e:
+                print("Hand inference failed:", e)
+                continue
+            infer_ms = (time.perf_counter() - captured) * 1000
+
+            tips = []
+            if results.multi_hand_landmarks:
+                for hand_landmarks in results.multi_hand_landmarks:
+                    lm = hand_landmarks.landmark[8]
+                    # terug van crop naar volledig camera frame
+                    x = x0 + lm.x * (x1 - x0)
+                    y = y0 + lm.y * (y1 - y0)
+                    tips.append((1.0 - x if inverted else x, y))
+
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            preview = cv2.flip(frame_rgb, 1) if inverted else frame_rgb
+            with self._lock:
+                self._seq += 1
+                self._latest = HandSample(self._seq, captured, tips, preview, infer_ms)
+
+
+def _tips(results):
+    if not results.multi_hand_landmarks:
+        return []
+    return [(h.landmark[8].x, h.landmark[8].y) for h in results.multi_hand_landmarks]
+
+
+def _to_frame(tips, roi):
+    # vingertoppen van crop coordinaten terug naar het volledige frame
+    if roi is None:
+        return tips
+    x0, y0, x1, y1 = roi
+    return [(x0 + x * (x1 - x0), y0 + y * (y1 - y0)) for x, y in tips]
+
+
+def benchmark(frames, scales=(1.0, 0.75, 0.5), rois=(None, (0.3, 0.0, 0.7, 1.0)),
+              complexities=(1, 0), max_hands=(1, 2), repeat=3):
+    """Times hands.process for every configuration and compares its fingertips to the default model.
+
+    The reference is complexity 1 on the full frame at full resolution (the
+    game's defaults). `found` is the share of reference tips a configuration
+    also finds, `err_px` the mean distance to them in frame pixels.
+    """
+    h, w = frames[0].shape[:2]
+    hands = create_hands(1, max(max_hands))
+    reference = [_tips(hands.process(prepare_frame(frame)[0])) for frame in frames]
+    hands.close()
+
+    results = []
+    for complexity in complexities:
+        for n_hands in max_hands:
+            hands = create_hands(complexity, n_hands)
+            for roi in rois:
+                for scale in scales:
+                    # eerste frame niet meetellen: model opwarmen
+                    hands.process(prepare_frame(frames[0], scale, roi)[0])
+                    t0 = time.perf_counter()
+                    n = 0
+                    tips = []
+                    for r in range(repeat):
+                        for frame in frames:
+                            result = hands.process(prepare_frame(frame, scale, roi)[0])
+                            n += 1
+                            if r == 0:
+                                tips.append(_to_frame(_tips(result), roi))
+                    ms = (time.perf_counter() - t0) * 1000 / n
+
+                    # elke referentie top aan de dichtste gevonden top koppelen
+                    expected = found = 0
+                    err = 0.0
+                    for ref, got in zip(reference, tips):
+                        for rx, ry in ref[:n_hands]:
+                            expected += 1
+                            if got:
+                                d = min(((gx - rx) * w) ** 2 + ((gy - ry) * h) ** 2 for gx, gy in got) ** 0.5
+                                if d < 0.05 * w:
+                                    found += 1
+                                    err += d
+                    results.append({"model_complexity": complexity, "max_num_hands": n_hands,
+                                    "crop": roi is not None, "scale": scale, "ms": ms,
+                                    "found": found / expected if expected else None,
+                                    "err_px": err / found if found else None})
+            hands.close()
+    return results
+
+
+if __name__ == "__main__":
+    # python hand_tracker.py [afbeelding ...]   zonder argumenten: 30 frames van camera 0
+    if len(sys.argv) > 1:
+        frames = [cv2.imread(p) for p in sys.argv[1:]]
+        frames = [f for f in frames if f is not None]
+    else:
+        cap = cv2.VideoCapture(0)
+        frames = []
+        for _ in range(30):
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        cap.release()
+
+    if not frames:
+        sys.exit("no frames to benchmark")
+
+    print(f"{'complexity':>10} {'hands':>5} {'crop':>5} {'scale':>5} {'ms/inference':>13} {'found':>6} {'err px':>7}")
+    for r in benchmark(frames):
+        found = f"{r['found']:.0%}" if r["found"] is not None else "-"
+        err = f"{r['err_px']:.1f}" if r["err_px"] is not None else "-"
+        print(f"{r['model_complexity']:>10} {r['max_num_hands']:>5} {str(r['crop']):>5} {r['scale']:>5} "
+              f"{r['ms']:>13.2f} {found:>6} {err:>7}")
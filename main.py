@@ -6,8 +6,15 @@ import game_logic
 import time
 import os
 import math
-from songs import find_songs, load_song
-from draw_utils import draw_gear
+import argparse
+from songs import find_songs, load_song_async, finish_song
+from draw_utils import draw_gear, get_overlay, render_text, DirtyRects
+from score_store import ScoreStore
+from particles import ParticleSystem
+from song_clock import SongClock
+from perf import FrameTimer, ProfileCapture
+from replay import ReplayWriter, quantize
+from hand_tracker import HandTracker, create_hands, lane_roi
 import cv2
 import ctypes
 
@@ -25,6 +32,40 @@ LANES_CAMERA = 4
 LANE_KEYS = [pygame.K_d, pygame.K_f, pygame.K_j, pygame.K_k]
 LANE_LABELS = ["D", "F", "J", "K"]
 
+# alleen gewijzigde stukken van het scherm updaten i.p.v. elke frame flip (software renderers)
+DIRTY_RECTS = False
+
+# frame rate: 60, 120, 144, 240, ... of 0 = onbeperkt (high refresh monitors)
+TARGET_FPS = 60
+# noten, misses en particles lopen aan een vaste rate, los van de frame rate
+SIM_HZ = 120
+ERROR_FLASH_STEPS = SIM_HZ // 4  # rode flash bij een fout, 0.25s
+# vertraging van de audio output in ms (bv. bluetooth koptelefoon), positief = geluid komt later
+AUDIO_OFFSET_MS = 0
+
+# frame timers per fase van de loop; F3 toont de grafiek (en zet ze aan), bij afsluiten een dump
+PERF_TIMERS = False
+PERF_DUMP = "perf_frames.csv"  # .csv of .jsonl
+# F4: cProfile + stack sampler over de volgende PROFILE_FRAMES frames, naar profiles/
+PROFILE_FRAMES = 600
+# python main.py --profile 600: profiel van de eerste 600 frames na de start van het volgende liedje
+_parser = argparse.ArgumentParser(description="MIDI Hero")
+_parser.add_argument("--profile", type=int, nargs="?", const=PROFILE_FRAMES, default=0, metavar="FRAMES",
+                     help=f"profile the first FRAMES frames of the next song (default {PROFILE_FRAMES})")
+PROFILE_ON_START = _parser.parse_known_args()[0].profile
+
+# elke run als binaire replay log in REPLAY_DIR, na te spelen met python replay.py <bestand>
+RECORD_REPLAYS = True
+REPLAY_DIR = "replays"
+
+# hand tracking: standaard het volledige frame met het gewone model. Op zwakke cpu's kan het sneller
+# met een kleinere scale, een crop of model 0, maar meet eerst snelheid en nauwkeurigheid met python hand_tracker.py
+HAND_INFERENCE_SCALE = 1.0     # downscale van het camera frame voor mediapipe, bv. 0.5
+HAND_CROP_TO_LANES = False     # enkel de strook met de lanes verwerken (volledige hoogte)
+HAND_MODEL_COMPLEXITY = 1      # 0 = licht model, 1 = nauwkeuriger maar trager
+HAND_MAX_HANDS = 2
+HAND_INFERENCE_HZ = 30         # max inferences per seconde, los van de fps; 0 = onbeperkt
+
 # Mogelijke kleuren van blokken
 BLOCK_COLORS = [
     (0, 200, 200),
@@ -45,6 +86,11 @@ screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
 pygame.display.set_caption("MIDI Hero")
 
 clock = pygame.time.Clock()
+sim_clock = game_logic.FixedTimestep(SIM_HZ)
+song_clock = SongClock(audio_offset=AUDIO_OFFSET_MS / 1000.0)
+dirty = DirtyRects(enabled=DIRTY_RECTS)
+perf = FrameTimer(enabled=PERF_TIMERS, target_fps=TARGET_FPS)
+profiler = ProfileCapture()
 
 font_small = pygame.font.Font(None, 32)
 font_medium = pygame.font.Font(None, 48)
@@ -124,15 +170,17 @@ last_hand_hit_time = [0.0] * LANES_KEYBOARD
 use_camera_controls = False
 camera_available = False
 camera_inverted = False
+hand_tracker = None
+last_hand_seq = 0
 if HAVE_MEDIAPIPE:
     try:
         cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
         if cap is not None and cap.isOpened():
             camera_available = True
-            mp_hands = mp.solutions.hands.Hands(static_image_mode=False,
-                                                max_num_hands=2,
-                                                min_detection_confidence=0.5,
-                                                min_tracking_confidence=0.5)
+            mp_hands = create_hands(HAND_MODEL_COMPLEXITY, HAND_MAX_HANDS)
+            # capture + inference op een aparte thread, de game loop leest enkel het laatste resultaat
+            hand_tracker = HandTracker(cap, mp_hands, scale=HAND_INFERENCE_SCALE,
+                                       rate_hz=HAND_INFERENCE_HZ).start()
         else:
             camera_available = False
 
@@ -167,7 +215,8 @@ awaiting_name = False
 pending_song_index = None
 player_name = ""
 current_song_key = None
-scores_file = "scores.json"
+scores_file = "scores.json"  # oud formaat, wordt eenmalig geimporteerd
+scores_db = "scores.db"
 show_scoreboard = False
 scoreboard_entries = []
 current_song_length = 0.0
@@ -175,24 +224,23 @@ end_of_song = False
 bar_full_at = None # pregress bar is vol
 preview_song_playing = None  # Momenteel gelecteerd liedje
 preview_song_index = None 
+loading_future = None  # achtergrond load van het gekozen liedje
+loading_song_index = None
 
 # ---------- GAME STATE ----------
 started = False
 music_started = False
-start_time = None
-active_blocks = []
-active_pieces = []
-notes = []
-score = 0
-score_multiplier = 1
+active_blocks = game_logic.BlockStore(lanes=max(LANES_KEYBOARD, LANES_CAMERA))
+active_pieces = ParticleSystem()
+scheduler = None
+judge = None  # HitJudge van het huidige liedje, gemaakt bij de start
+last_judgement = None  # (tekst, tijd) voor de PERFECT/GREAT/... popup
+scoring = game_logic.ScoreKeeper()  # score, streak en multiplier
+recorder = None  # ReplayWriter van de huidige run
 music_play_scheduled = False
-music_play_time = None
 paused = False
-pause_start = None
-pause_offset = 0
 error_flash = 0  
 pause_button_selected = 0  # 0 = main menu, 1 = settings, 2 = ragequit 
-streak = 0
 last_hand_positions = []
 last_frame_preview = None
 
@@ -211,90 +259,31 @@ hit_window = 40
 gear_rect = pygame.Rect(screen.get_width() - 80, 30, 50, 50)
 
 # ---------- SCOREBOARD ----------
-def _load_scores_file(path):
-    try:
-        import json
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-            
-    except Exception:
-        pass
-    return {}
-
-def _save_scores_file(path, data):
-    try:
-        import json
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
-    
-    except Exception:
-        return False
-
-def save_score_entry(song_key, name, sc, level, path):
-    scores = _load_scores_file(path)
-    lst = scores.get(song_key, [])
-    from datetime import datetime
-    entry = {"name": name, "score": sc, "level": level, "date": datetime.now().isoformat()}
-    lst.append(entry)
-    lst = sorted(lst, key=lambda x: x.get('score', 0), reverse=True)[:50]
-    scores[song_key] = lst
-    _save_scores_file(path, scores)
-    return lst
-
-# ---------- zooi ----------
-
-def _seg_intersects_rect(p1, p2, rect):
-    if rect.collidepoint(p1) or rect.collidepoint(p2):
-        return True
-
-    # helper for segment intersection
-    def _orient(a, b, c):
-        return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0])
-
-    def _on_segment(a, b, c):
-        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
-
-    a = p1; b = p2
-    # rectangle corners
-    rx1, ry1 = rect.topleft
-    rx2, ry2 = rect.topright
-    rx3, ry3 = rect.bottomright
-    rx4, ry4 = rect.bottomleft
-    edges = [((rx1, ry1), (rx2, ry2)), ((rx2, ry2), (rx3, ry3)),
-             ((rx3, ry3), (rx4, ry4)), ((rx4, ry4), (rx1, ry1))]
-
-    for (c, d) in edges:
-        o1 = _orient(a, b, c)
-        o2 = _orient(a, b, d)
-        o3 = _orient(c, d, a)
-        o4 = _orient(c, d, b)
-
-        if o1 == 0 and _on_segment(a, b, c):
-            return True
-        if o2 == 0 and _on_segment(a, b, d):
-            return True
-        if o3 == 0 and _on_segment(c, d, a):
-            return True
-        if o4 == 0 and _on_segment(c, d, b):
-            return True
-
-        if (o1 > 0) != (o2 > 0) and (o3 > 0) != (o4 > 0):
-            return True
-
-    return False
-
-
+score_store = ScoreStore(scores_db, json_path=scores_file)
 
+def save_score_entry(song_key, name, sc, level, store):
+    # een insert in de score database, de cache van de store wordt meteen vernieuwd
+    return store.add(song_key, name, sc, level)
 
 # ---------- MAIN LOOP ----------
 background = None
 
 while running:
+    perf.frame()
+    profiler.frame()
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            perf.toggle_overlay()
+            dirty.full()
+            continue
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            # muziek en song klok lopen gewoon door tijdens de capture
+            profiler.start(frames=PROFILE_FRAMES)
+            continue
         
         if show_scoreboard and in_menu and (event.type == pygame.KEYDOWN or (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1)):
             show_scoreboard = False
@@ -305,8 +294,8 @@ while running:
             current_song_key = None
             active_blocks.clear()
             active_pieces.clear()
-            notes = []
-            score = 0
+            scheduler = None
+            scoring.reset()
             music_started = False
             started = False
             bar_full_at = None
@@ -322,13 +311,20 @@ while running:
                     paused = True
                     settings_from_pause = False
 
+            elif in_menu and loading_future is not None:
+                # laden annuleren, resultaat wordt genegeerd
+                loading_future.cancel()
+                loading_future = None
+
             elif in_menu:
                 running = False
                 
             else:
                 if not paused:
                     paused = True
-                    pause_start = time.time()
+                    song_clock.pause()
+                    # de flash telt af in sim stappen en die staan stil tijdens pauze
+                    error_flash = 0
                     pause_button_selected = 0
                     try: 
                         pygame.mixer.music.pause()
@@ -337,9 +333,7 @@ while running:
 
                 else:
                     paused = False
-                    if pause_start:
-                        pause_offset += time.time() - pause_start
-                    pause_start = None
+                    song_clock.resume()
                     try: 
                         pygame.mixer.music.unpause()
                     except: 
@@ -373,7 +367,10 @@ while running:
                 # close & save
                 close_rect = pygame.Rect(cx - 100, cy + 270, 200, 50)
 
-                if diff_left.collidepoint(mx, my):
+                # tijdens een run ligt de moeilijkheid vast: judge, blokken en replay log zijn erop gebouwd
+                if (diff_left.collidepoint(mx, my) or diff_right.collidepoint(mx, my)) and started:
+                    print("Difficulty can't be changed during a song.")
+                elif diff_left.collidepoint(mx, my):
                     if difficulty_level > 1: difficulty_level -= 1
                 elif diff_right.collidepoint(mx, my):
                     if difficulty_level < 3: difficulty_level += 1
@@ -403,9 +400,7 @@ while running:
                         settings_from_pause = False
 
                 # moeilijkheid update (lock in)
-                if difficulty_level == 3: MOEILIJKHEID = 50
-                elif difficulty_level == 2: MOEILIJKHEID = 75
-                elif difficulty_level == 1: MOEILIJKHEID = 100
+                MOEILIJKHEID = game_logic.DIFFICULTY_BLOCK_SIZE[difficulty_level]
 
             # main menu settings click handler
             elif in_menu and not show_settings:
@@ -429,7 +424,10 @@ while running:
                 # close & save
                 close_rect = pygame.Rect(cx - 100, cy + 200, 200, 50)
 
-                if diff_left.collidepoint(mx, my):
+                # tijdens een run ligt de moeilijkheid vast: judge, blokken en replay log zijn erop gebouwd
+                if (diff_left.collidepoint(mx, my) or diff_right.collidepoint(mx, my)) and started:
+                    print("Difficulty can't be changed during a song.")
+                elif diff_left.collidepoint(mx, my):
                     if difficulty_level > 1: difficulty_level -= 1
                 elif diff_right.collidepoint(mx, my):
                     if difficulty_level < 3: difficulty_level += 1
@@ -447,9 +445,7 @@ while running:
                         paused = True
                         settings_from_pause = False
 
-                if difficulty_level == 3: MOEILIJKHEID = 50
-                elif difficulty_level == 2: MOEILIJKHEID = 75
-                elif difficulty_level == 1: MOEILIJKHEID = 100
+                MOEILIJKHEID = game_logic.DIFFICULTY_BLOCK_SIZE[difficulty_level]
 
             # pauze menu click handler
             elif not in_menu and paused:
@@ -473,11 +469,11 @@ while running:
                     started = False
                     paused = False
                     music_started = False
-                    start_time = None
+                    song_clock.stop()
                     active_blocks.clear()
-                    score = 0
-                    for n in notes:
-                        if "spawned" in n: del n["spawned"]
+                    scoring.reset()
+                    if scheduler:
+                        scheduler.reset()
                 elif settings_rect.collidepoint(mx, my):
                     # settings vanuit pauze menu
                     show_settings = True
@@ -492,6 +488,14 @@ while running:
 
         # -------- KEYBOARD INPUT (menu) --------
         if in_menu and not show_settings:
+            if loading_future is not None and event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_UP, pygame.K_DOWN):
+                    # ander liedje gekozen: lopende load laten vallen
+                    loading_future.cancel()
+                    loading_future = None
+                else:
+                    continue
+
             if awaiting_name:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_BACKSPACE:
@@ -504,18 +508,10 @@ while running:
                             player_name = "Player"
 
                         if pending_song_index is not None and songs:
-                            bg, notes, length = load_song(songs[pending_song_index], screen)
-                            background = bg
-                            active_blocks.clear()
-                            active_pieces.clear()
-                            score = 0
-                            started = False
-                            music_started = False
-                            in_menu = False
-                            current_song_key = songs[pending_song_index]["name"]
-                            current_song_length = length
+                            # midi + achtergrond laden op de loader thread, zie DRAW MENU
+                            loading_future = load_song_async(songs[pending_song_index], screen)
+                            loading_song_index = pending_song_index
                             pending_song_index = None
-                            bar_full_at = None
 
                     elif event.key == pygame.K_ESCAPE:
                         awaiting_name = False
@@ -541,58 +537,50 @@ while running:
         # -------- KEYBOARD INPUT (game) --------
         if not in_menu:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and not started:
-                start_time = time.time()
                 started = True
                 paused = False
-                pause_start = None
-                pause_offset = 0
-
-                # deze shit werkt niet zoals het hoort :(
 
+                # muziek start als de eerste noot de hit lijn bereikt, daarna volgt de klok de audio
                 block_center_offset = MOEILIJKHEID / 2
                 lead_time = (hit_y - block_center_offset) / PIXELS_PER_SECOND
-                music_play_time = start_time + lead_time
+                judge = game_logic.HitJudge(scheduler.times, scheduler.pitches, LANES_CAMERA if (use_camera_controls and camera_available) else LANES_KEYBOARD,
+                                            MOEILIJKHEID * 1.5 / PIXELS_PER_SECOND, lead_time)
+                last_judgement = None
+                if recorder is not None:
+                    recorder.close()  # vorige run niet afgemaakt
+                recorder = None
+                if RECORD_REPLAYS:
+                    recorder = ReplayWriter.for_song(REPLAY_DIR, current_song_key or "", chart, difficulty_level, len(judge.times),
+                                                     SIM_HZ, screen.get_size())
+                song_clock.start(lead_time)
+                sim_clock.reset(0.0)  # nu al, niet pas bij de eerste steps(): een aanslag in het eerste frame logt anders de oude tick
                 music_play_scheduled = True
                 bar_full_at = None
+                if PROFILE_ON_START:
+                    profiler.start(frames=PROFILE_ON_START)
+                    PROFILE_ON_START = 0
 
             elif event.type == pygame.KEYDOWN and started and not paused:
                 if event.key in LANE_KEYS:
                     lane_index = LANE_KEYS.index(event.key)
-                    
-                    hit_any = False
-
-                    for block in active_blocks:
-                        b_lane = int((block["rect"].centerx - lane_left) // (lane_width + LANE_SPACING))
-                        if b_lane == lane_index:
-                            # Only register a hit if the block is at or above the hit line
-                            if abs(block["rect"].y - hit_y) < MOEILIJKHEID and block["rect"].y <= hit_y:
-                                # Base score with streak multiplier, then apply difficulty multiplier
-                                difficulty_multiplier = 1.0
-                                if difficulty_level == 2:
-                                    difficulty_multiplier = 1.25
-                                elif difficulty_level == 3:
-                                    difficulty_multiplier = 1.50
-                                score += int(100 * score_multiplier * difficulty_multiplier)
-                                block["color"] = (0, 255, 0)  # maakt blokje groen op hit
-                                block["hit"] = True
-                                block["hit_time"] = pygame.time.get_ticks() # Store the start time of the animation
-                                hit_any = True
-                                break
-
-                    # streak multipliers
-                    if hit_any:
-                        streak += 1
-                        if streak >= 25:
-                            score_multiplier = 2
-                        if streak >= 100:
-                            score_multiplier = 3
-                        if streak >= 250:
-                            score_multiplier = 5
+
+                    # aanslag op de song klok beoordelen: dichtste noot in de lane, ms vensters per moeilijkheid
+                    # score, streak en multiplier regels zitten in game_logic (zelfde als headless)
+                    # op de microseconde zoals in de replay log, dan geeft naspelen exact dezelfde score
+                    press_time = quantize(song_clock.time())
+                    if recorder is not None:
+                        recorder.press(sim_clock.tick, press_time, lane_index)
+                        if recorder.closed:
+                            recorder = None  # schrijven mislukt, verder spelen zonder replay
+                    judgement, slot = game_logic.press_lane(lane_index, press_time, judge, active_blocks,
+                                                            scoring, difficulty_level, time.time())
+                    last_judgement = (judgement, time.time())
+                    if slot is not None:
+                        # blokje is groen en popt, plus wat vonkjes
+                        hit_rect = active_blocks.rect(slot)
+                        active_pieces.burst(hit_rect.centerx, hit_rect.centery, (0, 255, 0))
                     else:
-                        streak = 0
-                        score_multiplier = 1
-                        score -= 20
-                        error_flash = 15
+                        error_flash = ERROR_FLASH_STEPS
 
             # mouse hover voor pauze menu
             if paused and event.type == pygame.MOUSEMOTION:
@@ -629,11 +617,11 @@ while running:
                         started = False
                         paused = False
                         music_started = False
-                        start_time = None
+                        song_clock.stop()
                         active_blocks.clear()
-                        score = 0
-                        for n in notes:
-                            if "spawned" in n: del n["spawned"]
+                        scoring.reset()
+                        if scheduler:
+                            scheduler.reset()
                     elif pause_button_selected == 1:
                         # settings menu vanuit pauze want we gaan niet elke keer terug naar het main menu he mannekes
                         show_settings = True
@@ -643,7 +631,33 @@ while running:
                         except: pass
                         running = False
 
+    perf.mark("events")
+
     # ---------- DRAW MENU ----------
+    if in_menu and loading_future is not None and loading_future.done():
+        future, loading_future = loading_future, None
+        try:
+            bg, chart, length = finish_song(songs[loading_song_index], future.result())
+        except Exception as e:
+            print(f"[DEBUG] Error loading song: {e}", flush=True)
+        else:
+            background = bg
+            scheduler = game_logic.NoteScheduler(chart)
+            active_blocks.clear()
+            # pool vooraf groot genoeg maken voor het drukste stuk van het liedje
+            block_lifetime = (hit_y + MOEILIJKHEID * 1.5) / PIXELS_PER_SECOND + active_blocks.FADE_SECONDS
+            active_blocks.reserve(game_logic.peak_notes_in_window(chart.times, block_lifetime))
+            active_blocks.grows = 0
+            active_pieces.clear()
+            scoring.reset()
+            started = False
+            music_started = False
+            in_menu = False
+            current_song_key = songs[loading_song_index]["name"]
+            current_song_length = length
+            bar_full_at = None
+        loading_song_index = None
+
     if in_menu:
         # preview toegevoegd van liedjes
         try:
@@ -676,24 +690,42 @@ while running:
                          font_small, font_medium, font_big, gear_rect,
                          use_camera=use_camera_controls, camera_available=camera_available,
                          camera_inverted=camera_inverted, background_image=cat_bg, title_image=title_img,
-                         currently_playing_song=preview_song_index)
+                         currently_playing_song=preview_song_index, score_store=score_store)
 
         if awaiting_name:
-            overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 200))
-            screen.blit(overlay, (0, 0))
+            screen.blit(get_overlay(screen.get_size(), (0, 0, 0, 200)), (0, 0))
             w, h = screen.get_size()
-            title = font_big.render("Enter Your Name", True, (255, 255, 255))
+            title = render_text(font_big, "Enter Your Name", (255, 255, 255))
             screen.blit(title, title.get_rect(center=(w//2, h//2 - 100)))
             box_rect = pygame.Rect(w//2 - 300, h//2 - 30, 600, 72)
             pygame.draw.rect(screen, (40,40,40), box_rect, border_radius=8)
             pygame.draw.rect(screen, (200,200,200), box_rect, 2, border_radius=8)
             name_text = player_name if player_name else "Type your name..."
-            txt = font_medium.render(name_text, True, (230,230,230))
+            txt = render_text(font_medium, name_text, (230,230,230))
             screen.blit(txt, txt.get_rect(midleft=(box_rect.x + 16, box_rect.centery)))
-            hint = font_small.render("Press ENTER to confirm — ESC to cancel", True, (180,180,180))
+            hint = render_text(font_small, "Press ENTER to confirm — ESC to cancel", (180,180,180))
             screen.blit(hint, hint.get_rect(center=(w//2, h//2 + 60)))
 
+        if loading_future is not None:
+            screen.blit(get_overlay(screen.get_size(), (0, 0, 0, 200)), (0, 0))
+            w, h = screen.get_size()
+            song_name = songs[loading_song_index]["name"] if loading_song_index is not None else ""
+            title = render_text(font_big, f"Loading {song_name}", (255, 255, 255))
+            screen.blit(title, title.get_rect(center=(w//2, h//2 - 100)))
+
+            # draaiende bolletjes
+            spin = time.time() * 8
+            for i in range(8):
+                ang = i * (math.pi / 4)
+                px = w//2 + int(math.cos(ang) * 36)
+                py = h//2 + int(math.sin(ang) * 36)
+                fade = ((i - spin) % 8) / 8
+                col = (int(72 + 183 * fade), int(210 - 34 * fade), int(203 - 172 * fade))
+                pygame.draw.circle(screen, col, (px, py), 7)
+
+            hint = render_text(font_small, "ESC to cancel", (180,180,180))
+            screen.blit(hint, hint.get_rect(center=(w//2, h//2 + 90)))
+
         if show_scoreboard:
             if end_of_song and scoreboard_bg is not None:
                 try:
@@ -701,34 +733,38 @@ while running:
                     screen.blit(bg_s, (0, 0))
                 except Exception:
                     pass
-            overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-            overlay.fill((8, 12, 30, 230))
-            screen.blit(overlay, (0, 0))
+            screen.blit(get_overlay(screen.get_size(), (8, 12, 30, 230)), (0, 0))
             cx = screen.get_width()//2
-            header = font_big.render("Scoreboard", True, (255, 215, 0))
+            header = render_text(font_big, "Scoreboard", (255, 215, 0))
             screen.blit(header, header.get_rect(center=(cx, 80)))
             song_name = os.path.splitext(os.path.basename(current_song_key))[0] if current_song_key else "Unknown"
-            sub = font_small.render(f"{song_name}  —  Level {difficulty_level}", True, (200,200,200))
+            sub = render_text(font_small, f"{song_name}  —  Level {difficulty_level}", (200,200,200))
             screen.blit(sub, sub.get_rect(center=(cx, 120)))
             start_y = 170
             max_show = 10
 
             for i, e in enumerate(scoreboard_entries[:max_show]):
-                rank = font_small.render(f"{i+1}", True, (240,200,50))
-                name = font_medium.render(e.get('name','?'), True, (255,255,255))
-                score_txt = font_medium.render(str(e.get('score',0)), True, (0,220,120))
-                level_txt = font_small.render(f"L{e.get('level','?')}", True, (180,180,180))
+                rank = render_text(font_small, f"{i+1}", (240,200,50))
+                name = render_text(font_medium, e.get('name','?'), (255,255,255))
+                score_txt = render_text(font_medium, str(e.get('score',0)), (0,220,120))
+                level_txt = render_text(font_small, f"L{e.get('level','?')}", (180,180,180))
                 y = start_y + i * 56
                 screen.blit(rank, rank.get_rect(midleft=(cx - 240, y+20)))
                 screen.blit(name, name.get_rect(midleft=(cx - 200, y+18)))
                 screen.blit(level_txt, level_txt.get_rect(midleft=(cx + 40, y+18)))
                 screen.blit(score_txt, score_txt.get_rect(midright=(cx + 240, y+18)))
 
-            footer = font_small.render("Press any key or click to return to menu", True, (170,170,170))
+            footer = render_text(font_small, "Press any key or click to return to menu", (170,170,170))
             screen.blit(footer, footer.get_rect(center=(cx, screen.get_height() - 60)))
 
-        pygame.display.flip()
-        clock.tick(60)
+        # menu is altijd een volledige frame
+        perf.mark("render")
+        perf.draw(screen, font_small)
+        dirty.full()
+        dirty.present()
+        perf.mark("present")
+        clock.tick(TARGET_FPS)
+        perf.mark("tick")
         continue
 
     # ---------- GAME UPDATE MET CAMERA----------
@@ -740,112 +776,105 @@ while running:
     lane_area_width = lane_width * current_lanes + LANE_SPACING * (current_lanes - 1)
     lane_left = (screen.get_width() - lane_area_width) // 2
 
-    if use_camera_controls and camera_available and started and not paused:
-        ret, frame = cap.read()
-        if ret:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            if camera_inverted:
-                frame_rgb_preview = cv2.flip(frame_rgb, 1)
-            else:
-                frame_rgb_preview = frame_rgb
-            last_frame_preview = frame_rgb_preview.copy()
-            results = mp_hands.process(frame_rgb)
-
-            prev_hand_positions = list(last_hand_positions)
-            last_hand_positions = []
-
-            if results.multi_hand_landmarks:
-                for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                    lm = hand_landmarks.landmark[8]
-                    lm_x = 1.0 - lm.x if camera_inverted else lm.x
-                    x_pixel = int(lm_x * screen.get_width())
-                    y_pixel = int(lm.y * screen.get_height())
-                    curr_pos = (x_pixel, y_pixel)
-                    last_hand_positions.append(curr_pos)
-
-                    prev = None
-
-                    if idx < len(prev_hand_positions):
-                        prev = prev_hand_positions[idx]
-                    else:
-                        best = None
-                        best_d = None
-                        for p in prev_hand_positions:
-                            dx = p[0] - curr_pos[0]
-                            dy = p[1] - curr_pos[1]
-                            d = dx*dx + dy*dy
-                            if best is None or d < best_d:
-                                best = p; best_d = d
-                        if best is not None and best_d < (screen.get_width()*0.25)**2:
-                            prev = best
-
-                    if prev is not None:
-                        dx = curr_pos[0] - prev[0]
-                        dy = curr_pos[1] - prev[1]
-                        dist2 = dx*dx + dy*dy
-                        MIN_SLICE_DIST = 20  # pixels aan beweging om slice te tellen
-                        if dist2 >= (MIN_SLICE_DIST * MIN_SLICE_DIST):
-                            for block in list(active_blocks):
-                                rect = block["rect"]
-                                if _seg_intersects_rect(prev, curr_pos, rect):
-                                    # Ignore slices for blocks that have already passed the hit line
-                                    if rect.y > hit_y:
-                                        continue
-                                    # slice animatie 
-                                    bx, by = rect.x, rect.y
-                                    bw, bh = rect.width, rect.height
-                                    col = block.get("color", (255,255,255))
-
-                                    lp = {"rect": pygame.Rect(bx, by, bw//2, bh//2),
-                                          "vx": -200 + -50 * (dy/ (abs(dy)+0.001)), "vy": -200,
-                                          "color": col, "life": 1.2}
-
-                                    rp = {"rect": pygame.Rect(bx + bw//2, by, bw - bw//2, bh//2),
-                                          "vx": 200 + 50 * (dy/ (abs(dy)+0.001)), "vy": -200,
-                                          "color": col, "life": 1.2}
-                                    
-                                    active_pieces.append(lp)
-                                    active_pieces.append(rp)
-
-                                    try:
-                                        active_blocks.remove(block)
-                                    except Exception:
-                                        pass
-
-                                    # Base score with streak multiplier, then apply difficulty multiplier
-                                    difficulty_multiplier = 1.0
-                                    if difficulty_level == 2:
-                                        difficulty_multiplier = 1.25
-                                    elif difficulty_level == 3:
-                                        difficulty_multiplier = 1.50
-                                    score += int(100 * score_multiplier * difficulty_multiplier)
-                                    streak += 1
-                                    if streak >= 25:
-                                        score_multiplier = 2
-                                    if streak >= 50:
-                                        score_multiplier = 3
-                                    break
-            else:
-                last_hand_positions = []
+    if hand_tracker is not None:
+        hand_tracker.inverted = camera_inverted
+        if HAND_CROP_TO_LANES:
+            hand_tracker.roi = lane_roi(lane_left, lane_left + lane_area_width, screen.get_width())
+        hand_tracker.set_active(use_camera_controls and camera_available and started and not paused)
+
+    hand_sample = hand_tracker.latest() if hand_tracker is not None else None
+    if use_camera_controls and camera_available and started and not paused and hand_sample is not None and hand_sample.seq != last_hand_seq:
+        # enkel verwerken als de worker een nieuw frame heeft, nooit wachten op de camera
+        last_hand_seq = hand_sample.seq
+        last_frame_preview = hand_sample.preview
+        perf.value("inference", hand_sample.infer_ms)
+
+        prev_hand_positions = list(last_hand_positions)
+        last_hand_positions = []
+
+        if hand_sample.tips:
+            for idx, (lm_x, lm_y) in enumerate(hand_sample.tips):
+                x_pixel = int(lm_x * screen.get_width())
+                y_pixel = int(lm_y * screen.get_height())
+                curr_pos = (x_pixel, y_pixel)
+                last_hand_positions.append(curr_pos)
+
+                prev = None
+
+                if idx < len(prev_hand_positions):
+                    prev = prev_hand_positions[idx]
+                else:
+                    best = None
+                    best_d = None
+                    for p in prev_hand_positions:
+                        dx = p[0] - curr_pos[0]
+                        dy = p[1] - curr_pos[1]
+                        d = dx*dx + dy*dy
+                        if best is None or d < best_d:
+                            best = p; best_d = d
+                    if best is not None and best_d < (screen.get_width()*0.25)**2:
+                        prev = best
+
+                if prev is not None:
+                    dx = curr_pos[0] - prev[0]
+                    dy = curr_pos[1] - prev[1]
+                    dist2 = dx*dx + dy*dy
+                    MIN_SLICE_DIST = 20  # pixels aan beweging om slice te tellen
+                    if dist2 >= (MIN_SLICE_DIST * MIN_SLICE_DIST):
+                        if recorder is not None:
+                            recorder.slice(sim_clock.tick, quantize(song_clock.time()), prev, curr_pos)
+                            if recorder.closed:
+                                recorder = None  # schrijven mislukt, verder spelen zonder replay
+                        # eerste blok dat deze beweging raakt (een per beweging), enkel in de lanes die ze kruist
+                        # slice regels en score zitten in game_logic (zelfde als headless)
+                        lane_pitch = lane_width + LANE_SPACING
+                        for rect, color_idx in game_logic.slice_segment(prev, curr_pos, judge, active_blocks, scoring,
+                                                                        difficulty_level, lane_left, lane_pitch, hit_y):
+                            # slice animatie 
+                            bx, by = rect.x, rect.y
+                            bw, bh = rect.width, rect.height
+                            col = BLOCK_COLORS[color_idx]
+
+                            # twee helften die weg vliegen
+                            tilt = 50 * (dy / (abs(dy) + 0.001))
+                            active_pieces.emit(bx, by, bw//2, bh//2, -200 - tilt, -200, col)
+                            active_pieces.emit(bx + bw//2, by, bw - bw//2, bh//2, 200 + tilt, -200, col)
+
+    perf.mark("camera")
 
     if started and not paused:
-        elapsed = time.time() - start_time - pause_offset if start_time else 0
-        music_started, missed = game_logic.update_game(elapsed, notes, active_blocks,
-                   BLOCK_COLORS, current_color_idx,
-                   lane_left, lane_width, LANE_SPACING,
-                   MOEILIJKHEID, hit_y, music_started,
-                   lanes=current_lanes, pixels_per_second=PIXELS_PER_SECOND)
-
-        if missed and missed > 0:
-            streak = 0
-            error_flash = 15
-            score_multiplier = 1
+        elapsed = song_clock.time()
+        # vaste stappen tot de simulatie de songtijd heeft ingehaald, de render interpoleert ertussen
+        for sim_elapsed in sim_clock.steps(elapsed):
+            music_started, missed = game_logic.update_game(sim_elapsed, scheduler, active_blocks,
+                       BLOCK_COLORS, current_color_idx,
+                       lane_left, lane_width, LANE_SPACING,
+                       MOEILIJKHEID, hit_y, music_started,
+                       lanes=current_lanes, pixels_per_second=PIXELS_PER_SECOND,
+                       playable=judge.playable,
+                       miss_window=game_logic.HIT_WINDOWS_MS[difficulty_level][-1] / 1000.0)
+
+            if missed and missed > 0:
+                scoring.miss(missed)
+                error_flash = ERROR_FLASH_STEPS
+
+            if error_flash > 0:
+                error_flash -= 1
+
+            if active_pieces:
+                active_pieces.update(sim_clock.dt, gravity=800, max_y=screen.get_height() + 200)
+
+        if active_blocks.grows:
+            print(f"[DEBUG] block pool had to grow mid-song ({active_blocks.grows}x, now {active_blocks.capacity} slots)", flush=True)
+            active_blocks.grows = 0
+
+    active_blocks.place(sim_clock.render_time, PIXELS_PER_SECOND)
+    perf.mark("update")
 
     # ---------- DRAW GAME ----------
     active_labels = LANE_LABELS[:current_lanes]
 
-    elapsed_for_draw = time.time() - start_time - pause_offset if start_time else 0
+    elapsed_for_draw = song_clock.time()
     game_draw.render_game(screen, 
                           background, 
                           BLOCK_COLORS, 
@@ -860,8 +889,8 @@ while running:
                           pause_button_selected,
                           paused, 
                           started, 
-                          score, 
-                          streak, 
+                          scoring.score, 
+                          scoring.streak, 
                           error_flash,
                           use_camera=use_camera_controls and camera_available,
                           hand_positions=last_hand_positions,
@@ -871,7 +900,10 @@ while running:
                           active_pieces=active_pieces,
                           elapsed=elapsed_for_draw, 
                           song_length=current_song_length,
-                          score_multiplier=score_multiplier)
+                          score_multiplier=scoring.multiplier,
+                          dirty=dirty,
+                          sim_alpha=sim_clock.alpha,
+                          judgement=last_judgement)
 
     try:
         if current_song_length and current_song_length > 0 and not show_scoreboard:
@@ -888,8 +920,11 @@ while running:
         if bar_full_at is not None and not show_scoreboard:
             if time.time() - bar_full_at >= 5.0:
                 print(f"[DEBUG] 5s passed since bar_full_at ({bar_full_at:.3f}); finalizing scoreboard.", flush=True)
+                if recorder is not None:
+                    recorder.finish(sim_clock.tick, quantize(song_clock.time()), scoring.score)
+                    recorder = None
                 if current_song_key:
-                    scoreboard_entries = save_score_entry(current_song_key, player_name or "Player", score, difficulty_level, scores_file)
+                    scoreboard_entries = save_score_entry(current_song_key, player_name or "Player", scoring.score, difficulty_level, score_store)
                 else:
                     scoreboard_entries = []
 
@@ -905,6 +940,7 @@ while running:
 
     # settings overlay OVER de game renderen 
     if show_settings and not in_menu:
+        dirty.full()
         menu.render_settings_overlay(screen, 
                                      show_settings, 
                                      difficulty_level,
@@ -912,7 +948,8 @@ while running:
                                      BLOCK_COLORS,
                                      font_small, 
                                      font_medium, 
-                                     font_big)
+                                     font_big,
+                                     difficulty_locked=started)
 
     # fade-out voor scoreboard
     if bar_full_at is not None and not show_scoreboard:
@@ -920,38 +957,18 @@ while running:
             elapsed_since_full = max(0.0, time.time() - bar_full_at)
             t = min(1.0, elapsed_since_full / 5.0)
             alpha = int(180 * t)  # alpha value fade
-            fade = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-            fade.fill((0, 0, 0, alpha))
-            screen.blit(fade, (0, 0))
+            dirty.full()
+            screen.blit(get_overlay(screen.get_size(), (0, 0, 0, alpha)), (0, 0))
 
             remaining = max(0, 5 - int(elapsed_since_full))
-            info = font_small.render(f"Scoreboard in {remaining}s...", True, (220,220,220))
+            info = render_text(font_small, f"Scoreboard in {remaining}s...", (220,220,220))
             screen.blit(info, info.get_rect(center=(screen.get_width()//2, screen.get_height() - 120)))
 
         except Exception:
             pass
 
-    if error_flash > 0:
-        error_flash -= 1
-
-    if active_pieces:
-        dt = clock.get_time() / 1000.0
-        gravity = 800
-
-        for p in list(active_pieces):
-            p["vy"] += gravity * dt
-            p["rect"].x += int(p["vx"] * dt)
-            p["rect"].y += int(p["vy"] * dt)
-            p["life"] -= dt
-
-            if p["life"] <= 0 or p["rect"].y > screen.get_height() + 200:
-                try:
-                    active_pieces.remove(p)
-
-                except Exception:
-                    pass
-
     if show_scoreboard:
+        dirty.full()
         if end_of_song and scoreboard_bg is not None:
             try:
                 bg_s = pygame.transform.smoothscale(scoreboard_bg, screen.get_size())
@@ -960,23 +977,21 @@ while running:
             except Exception:
                 pass
 
-        overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        overlay.fill((8, 12, 30, 230))
-        screen.blit(overlay, (0, 0))
+        screen.blit(get_overlay(screen.get_size(), (8, 12, 30, 230)), (0, 0))
         cx = screen.get_width()//2
-        header = font_big.render("Scoreboard", True, (255, 215, 0))
+        header = render_text(font_big, "Scoreboard", (255, 215, 0))
         screen.blit(header, header.get_rect(center=(cx, 80)))
         song_name = os.path.splitext(os.path.basename(current_song_key))[0] if current_song_key else "Unknown"
-        sub = font_small.render(f"{song_name}  —  Level {difficulty_level}", True, (200,200,200))
+        sub = render_text(font_small, f"{song_name}  —  Level {difficulty_level}", (200,200,200))
         screen.blit(sub, sub.get_rect(center=(cx, 120)))
         start_y = 170
         max_show = 10
 
         for i, e in enumerate(scoreboard_entries[:max_show]):
-            rank = font_small.render(f"{i+1}", True, (240,200,50))
-            name = font_medium.render(e.get('name','?'), True, (255,255,255))
-            score_txt = font_medium.render(str(e.get('score',0)), True, (0,220,120))
-            level_txt = font_small.render(f"L{e.get('level','?')}", True, (180,180,180))
+            rank = render_text(font_small, f"{i+1}", (240,200,50))
+            name = render_text(font_medium, e.get('name','?'), (255,255,255))
+            score_txt = render_text(font_medium, str(e.get('score',0)), (0,220,120))
+            level_txt = render_text(font_small, f"L{e.get('level','?')}", (180,180,180))
             y = start_y + i * 56
             screen.blit(rank, rank.get_rect(midleft=(cx - 240, y+20)))
             screen.blit(name, name.get_rect(midleft=(cx - 200, y+18)))
@@ -993,22 +1008,27 @@ while running:
             menu_rect = pygame.Rect(right_x, y, bw, bh)
             pygame.draw.rect(screen, (40,40,40), replay_rect, border_radius=8)
             pygame.draw.rect(screen, (40,40,40), menu_rect, border_radius=8)
-            rtxt = font_medium.render("Replay", True, (255,255,255))
-            mtxt = font_medium.render("Back to Menu", True, (255,255,255))
+            rtxt = render_text(font_medium, "Replay", (255,255,255))
+            mtxt = render_text(font_medium, "Back to Menu", (255,255,255))
             screen.blit(rtxt, rtxt.get_rect(center=replay_rect.center))
             screen.blit(mtxt, mtxt.get_rect(center=menu_rect.center))
         else:
-            footer = font_small.render("Press any key or click to return to menu", True, (170,170,170))
+            footer = render_text(font_small, "Press any key or click to return to menu", (170,170,170))
             screen.blit(footer, footer.get_rect(center=(cx, screen.get_height() - 60)))
 
-    pygame.display.flip()
-    clock.tick(60)
+    perf.mark("render")
+    perf.draw(screen, font_small, dirty.add)
+    dirty.present()
+    perf.mark("present")
+    clock.tick(TARGET_FPS)
+    perf.mark("tick")
 
     # ---------- MUSIC ----------
     try:
-        if music_play_scheduled and not music_started and (music_play_time is not None) and time.time() >= music_play_time:
+        if music_play_scheduled and not music_started and song_clock.time() >= song_clock.lead_time:
             try:
                 pygame.mixer.music.play()
+                song_clock.music_started()
 
             except Exception:
                 pass
@@ -1016,9 +1036,7 @@ while running:
             music_play_scheduled = False
 
         if music_started and not show_scoreboard:
-            elapsed_check = 0.0
-            if start_time:
-                elapsed_check = time.time() - start_time - pause_offset
+            elapsed_check = song_clock.time()
 
             mixer_stopped = False
             try:
@@ -1028,7 +1046,7 @@ while running:
                 mixer_stopped = False
             
             # einde
-            all_spawned = all(n.get("spawned") for n in notes) if notes else True
+            all_spawned = scheduler.done if scheduler else True
 
             if (mixer_stopped or (current_song_length and elapsed_check >= (current_song_length - 0.05))) and all_spawned and not active_blocks and not active_pieces:
                 if bar_full_at is None:
@@ -1037,8 +1055,11 @@ while running:
 
                 if time.time() - bar_full_at >= 5.0:
                     print(f"[DEBUG] 5s elapsed since bar_full_at (audio branch). Saving score and showing scoreboard.")
+                    if recorder is not None:
+                        recorder.finish(sim_clock.tick, quantize(song_clock.time()), scoring.score)
+                        recorder = None
                     if current_song_key:
-                        scoreboard_entries = save_score_entry(current_song_key, player_name or "Player", score, difficulty_level, scores_file)
+                        scoreboard_entries = save_score_entry(current_song_key, player_name or "Player", scoring.score, difficulty_level, score_store)
                     else:
                         scoreboard_entries = []
                     show_scoreboard = True
@@ -1056,7 +1077,7 @@ while running:
         pass
     
     if started and not paused:
-        all_spawned = all(n.get("spawned") for n in notes) if notes else True
+        all_spawned = scheduler.done if scheduler else True
 
         if all_spawned and not active_blocks and not active_pieces:
             if bar_full_at is None:
@@ -1068,8 +1089,11 @@ while running:
                 music_started = False
                 started = False
                 
+                if recorder is not None:
+                    recorder.finish(sim_clock.tick, quantize(song_clock.time()), scoring.score)
+                    recorder = None
                 if current_song_key:
-                    scoreboard_entries = save_score_entry(current_song_key, player_name or "Player", score, difficulty_level, scores_file)
+                    scoreboard_entries = save_score_entry(current_song_key, player_name or "Player", scoring.score, difficulty_level, score_store)
                 else:
                     scoreboard_entries = []
 
@@ -1095,19 +1119,25 @@ while running:
                     if replay_rect.collidepoint(mx, my):
                         active_blocks.clear()
                         active_pieces.clear()
-                        score = 0
-                        streak = 0
-                        score_multiplier = 1
-                        for n in notes:
-                            if "spawned" in n: del n["spawned"]
-
-                        start_time = time.time()
-                        pause_offset = 0
+                        scoring.reset()
+                        if scheduler:
+                            scheduler.reset()
+
                         started = True
                         paused = False
                         block_center_offset = MOEILIJKHEID / 2
                         lead_time = (hit_y - block_center_offset) / PIXELS_PER_SECOND
-                        music_play_time = start_time + lead_time
+                        judge = game_logic.HitJudge(scheduler.times, scheduler.pitches, LANES_CAMERA if (use_camera_controls and camera_available) else LANES_KEYBOARD,
+                                                    MOEILIJKHEID * 1.5 / PIXELS_PER_SECOND, lead_time)
+                        last_judgement = None
+                        if recorder is not None:
+                            recorder.close()  # vorige run niet afgemaakt
+                        recorder = None
+                        if RECORD_REPLAYS:
+                            recorder = ReplayWriter.for_song(REPLAY_DIR, current_song_key or "", chart, difficulty_level, len(judge.times),
+                                                             SIM_HZ, screen.get_size())
+                        song_clock.start(lead_time)
+                        sim_clock.reset(0.0)  # nu al, niet pas bij de eerste steps(): een aanslag in het eerste frame logt anders de oude tick
                         music_play_scheduled = True
                         music_started = False
                         show_scoreboard = False
@@ -1125,8 +1155,8 @@ while running:
                         current_song_key = None
                         active_blocks.clear()
                         active_pieces.clear()
-                        notes = []
-                        score = 0
+                        scheduler = None
+                        scoring.reset()
                         music_started = False
                         started = False
                         bar_full_at = None
@@ -1141,8 +1171,8 @@ while running:
                     current_song_key = None
                     active_blocks.clear()
                     active_pieces.clear()
-                    notes = []
-                    score = 0
+                    scheduler = None
+                    scoring.reset()
                     music_started = False
                     started = False
                     break
@@ -1157,15 +1187,24 @@ while running:
                     current_song_key = None
                     active_blocks.clear()
                     active_pieces.clear()
-                    notes = []
-                    score = 0
+                    scheduler = None
+                    scoring.reset()
                     music_started = False
                     started = False
                     break
 
 pygame.quit()
 
+profiler.stop(wait=True)  # een lopende capture nog wegschrijven voor het proces stopt
+if recorder is not None:
+    recorder.close()
+if PERF_DUMP and perf.count:
+    print(f"[perf] {perf.dump(PERF_DUMP)} frames written to {PERF_DUMP}")
+
 # camera usage cleanup
+if hand_tracker is not None:
+    hand_tracker.stop()
+
 if 'cap' in globals() and cap is not None:
     try:
         cap.release()
@@ -1177,4 +1216,6 @@ if 'mp_hands' in globals() and mp_hands is not None:
         mp_hands.close()
 
     except Exception:
-        pass
\ No newline at end of file
+        pass
+
+score_store.close()
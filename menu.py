@@ -1,12 +1,37 @@
 import pygame
 import time
-from draw_utils import draw_gear
+from draw_utils import draw_gear, get_overlay, render_text
+
+
+# staat van de liedjeslijst tussen frames: scroll positie + gerenderde rijen
+_song_list = {"songs": None, "font": None, "rows": {}, "first": 0}
+
+
+def _row_surfaces(songs, font):
+    # nieuwe bibliotheek of font: cache leeggooien
+    if _song_list["songs"] is not songs or _song_list["font"] is not font:
+        _song_list["songs"] = songs
+        _song_list["font"] = font
+        _song_list["rows"] = {}
+    return _song_list["rows"]
+
+
+def _scroll_to(selected, visible, total):
+    first = _song_list["first"]
+    if selected < first:
+        first = selected
+    elif selected >= first + visible:
+        first = selected - visible + 1
+    first = max(0, min(first, total - visible))
+    _song_list["first"] = first
+    return first
 
 
 def render_menu(screen, songs, selected_song, show_settings, difficulty_level,
                 current_color_idx, BLOCK_COLORS, font_small, font_medium,
                 font_big, gear_rect, use_camera=False, camera_available=False,
-                camera_inverted=False, background_image=None, title_image=None, currently_playing_song=None):
+                camera_inverted=False, background_image=None, title_image=None, currently_playing_song=None,
+                score_store=None):
     # base background
     screen.fill((20, 20, 30))
     # optional decorative background image (e.g. cat.gif) drawn with partial alpha
@@ -66,11 +91,11 @@ def render_menu(screen, songs, selected_song, show_settings, difficulty_level,
             screen.blit(title_img_scaled, title_img_scaled.get_rect(center=(screen.get_width() // 2, 100)))
         except Exception:
             # Fallback to text if image fails
-            title = font_big.render("MIDI Hero", True, (255, 255, 255))
+            title = render_text(font_big, "MIDI Hero", (255, 255, 255))
             screen.blit(title, title.get_rect(center=(screen.get_width() // 2, 100)))
     else:
         # Text fallback
-        title = font_big.render("MIDI Hero", True, (255, 255, 255))
+        title = render_text(font_big, "MIDI Hero", (255, 255, 255))
         screen.blit(title, title.get_rect(center=(screen.get_width() // 2, 100)))
 
     # settings icoon
@@ -83,41 +108,59 @@ def render_menu(screen, songs, selected_song, show_settings, difficulty_level,
     # Song List
     start_y = 240
     if songs:
-        # Calculate bounds for all songs
         song_left = screen.get_width() // 2 - 200
         song_right = screen.get_width() // 2 + 200
+
+        # enkel de zichtbare rijen tekenen, de lijst scrollt mee met de selectie
+        row_h = 45
+        visible = max(1, (screen.get_height() - 60 - start_y) // row_h)
+        first = _scroll_to(selected_song, visible, len(songs))
+        last = min(len(songs), first + visible)
+        rows = _row_surfaces(songs, font_small)
+
+        # Draw border around the visible songs
         song_top = start_y - 25
-        song_bottom = start_y + len(songs) * 45 + 25
-        
-        # Draw border around all songs
+        song_bottom = start_y + (last - first) * row_h + 25
         song_list_rect = pygame.Rect(song_left, song_top, song_right - song_left, song_bottom - song_top)
         pygame.draw.rect(screen, (72, 210, 203), song_list_rect, 3, border_radius=8)
-        
-        for i, song in enumerate(songs):
-            color = (255, 176, 31) if i == selected_song else (150, 150, 150)
-            text = font_small.render(song["name"], True, color)
-            rect = text.get_rect(center=(screen.get_width() // 2, start_y + i * 45))
-            
+
+        for i in range(first, last):
+            selected = i == selected_song
+            text = rows.get(i)
+            if text is None or text[0] != selected:
+                color = (255, 176, 31) if selected else (150, 150, 150)
+                text = rows[i] = (selected, font_small.render(songs[i]["name"], True, color))
+            text = text[1]
+            rect = text.get_rect(center=(screen.get_width() // 2, start_y + (i - first) * row_h))
+
             screen.blit(text, rect)
-            
-            if i == selected_song:
+
+            if selected:
                 pygame.draw.polygon(screen, (255, 176, 31), [
                     (rect.left - 20, rect.centery),
                     (rect.left - 30, rect.top),
                     (rect.left - 30, rect.bottom)
                 ])
-        # scoreboard preview per song
-        try:
-            import json, os
-            scores = {}
 
-            if os.path.exists('scores.json'):
-                with open('scores.json', 'r', encoding='utf-8') as f:
-                    scores = json.load(f)
+        # scrollbar als niet alles past
+        if visible < len(songs):
+            track = pygame.Rect(song_right - 12, song_top + 10, 4, song_bottom - song_top - 20)
+            thumb_h = max(20, track.height * visible // len(songs))
+            thumb_y = track.top + (track.height - thumb_h) * first // (len(songs) - visible)
+            pygame.draw.rect(screen, (60, 70, 90), track, border_radius=2)
+            pygame.draw.rect(screen, (72, 210, 203), (track.left, thumb_y, track.width, thumb_h), border_radius=2)
+
+        # oude rijen buiten beeld vergeten zodat de cache klein blijft
+        if len(rows) > visible * 2:
+            for i in [i for i in rows if not first <= i < last]:
+                del rows[i]
 
+        # scoreboard preview per song
+        try:
+            # scores komen uit het geheugen van de score store, niet van schijf
             sel = songs[selected_song]
             key = sel.get('name')
-            entries = scores.get(key, [])
+            entries = score_store.top(key, 6) if score_store is not None else []
             
             panel_w = 420
             panel_h = 300
@@ -126,34 +169,32 @@ def render_menu(screen, songs, selected_song, show_settings, difficulty_level,
             panel_rect = pygame.Rect(panel_x, panel_y, panel_w, panel_h)
             pygame.draw.rect(screen, (40, 50, 70), panel_rect, border_radius=8)
             pygame.draw.rect(screen, (72, 210, 203), panel_rect, 2, border_radius=8)
-            hdr = font_medium.render('Top Scores', True, (255, 176, 31))
+            hdr = render_text(font_medium, 'Top Scores', (255, 176, 31))
             screen.blit(hdr, hdr.get_rect(midtop=(panel_rect.centerx, panel_rect.top + 12)))
             y = panel_rect.top + 56
 
             for i, e in enumerate(entries[:6]):
-                rank = font_small.render(str(i+1), True, (255, 176, 31))
-                name = font_small.render(e.get('name','?'), True, (230,230,230))
-                sc = font_small.render(str(e.get('score',0)), True, (72, 210, 203))
+                rank = render_text(font_small, str(i+1), (255, 176, 31))
+                name = render_text(font_small, e.get('name','?'), (230,230,230))
+                sc = render_text(font_small, str(e.get('score',0)), (72, 210, 203))
                 screen.blit(rank, rank.get_rect(topleft=(panel_rect.left + 12, y)))
                 screen.blit(name, name.get_rect(topleft=(panel_rect.left + 48, y)))
                 screen.blit(sc, sc.get_rect(topright=(panel_rect.right - 12, y)))
                 y += 42
 
             if not entries:
-                hint = font_small.render('No scores yet for this song', True, (160,160,160))
+                hint = render_text(font_small, 'No scores yet for this song', (160,160,160))
                 screen.blit(hint, hint.get_rect(center=(panel_rect.centerx, panel_rect.centery)))
 
         except Exception:
             pass
     else:
-        warn = font_small.render("No songs found in 'songs' folder!", True, (255, 100, 100))
+        warn = render_text(font_small, "No songs found in 'songs' folder!", (255, 100, 100))
         screen.blit(warn, warn.get_rect(center=(screen.get_width()//2, screen.get_height()//2)))
 
     # settings overlay
     if show_settings:
-        overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        screen.blit(overlay, (0, 0))
+        screen.blit(get_overlay(screen.get_size(), (0, 0, 0, 200)), (0, 0))
 
         cx, cy = screen.get_width() // 2, screen.get_height() // 2
         box_width, box_height = 600, 550
@@ -162,68 +203,68 @@ def render_menu(screen, songs, selected_song, show_settings, difficulty_level,
         pygame.draw.rect(screen, (72, 210, 203), box_rect, 3, border_radius=15)
 
         # settings opties
-        s_title = font_medium.render("SETTINGS", True, (255, 255, 255))
+        s_title = render_text(font_medium, "SETTINGS", (255, 255, 255))
         screen.blit(s_title, s_title.get_rect(center=(cx, cy - 180)))
 
         # moeiljkheid selector
-        d_label = font_small.render("DIFFICULTY", True, (180, 180, 180))
+        d_label = render_text(font_small, "DIFFICULTY", (180, 180, 180))
         screen.blit(d_label, d_label.get_rect(center=(cx, cy - 130)))
         diff_left = pygame.Rect(cx - 150, cy - 100, 40, 40)
         diff_right = pygame.Rect(cx + 110, cy - 100, 40, 40)
         pygame.draw.rect(screen, (70, 70, 80), diff_left, border_radius=5)
         pygame.draw.rect(screen, (70, 70, 80), diff_right, border_radius=5)
-        screen.blit(font_small.render("<", True, (255,255,255)), font_small.render("<", True, (255,255,255)).get_rect(center=diff_left.center))
-        screen.blit(font_small.render(">", True, (255,255,255)), font_small.render(">", True, (255,255,255)).get_rect(center=diff_right.center))
-        d_val = font_medium.render(f"Level {difficulty_level}", True, (255, 176, 31))
+        screen.blit(render_text(font_small, "<", (255,255,255)), render_text(font_small, "<", (255,255,255)).get_rect(center=diff_left.center))
+        screen.blit(render_text(font_small, ">", (255,255,255)), render_text(font_small, ">", (255,255,255)).get_rect(center=diff_right.center))
+        d_val = render_text(font_medium, f"Level {difficulty_level}", (255, 176, 31))
         screen.blit(d_val, d_val.get_rect(center=(cx, cy - 50)))
 
         # kleur selector
-        c_label = font_small.render("BLOCK COLOR", True, (180, 180, 180))
+        c_label = render_text(font_small, "BLOCK COLOR", (180, 180, 180))
         screen.blit(c_label, c_label.get_rect(center=(cx, cy + 10)))
         col_left = pygame.Rect(cx - 150, cy + 40, 40, 40)
         col_right = pygame.Rect(cx + 110, cy + 40, 40, 40)
         pygame.draw.rect(screen, (70, 70, 80), col_left, border_radius=5)
         pygame.draw.rect(screen, (70, 70, 80), col_right, border_radius=5)
-        screen.blit(font_small.render("<", True, (255,255,255)), font_small.render("<", True, (255,255,255)).get_rect(center=col_left.center))
-        screen.blit(font_small.render(">", True, (255,255,255)), font_small.render(">", True, (255,255,255)).get_rect(center=col_right.center))
+        screen.blit(render_text(font_small, "<", (255,255,255)), render_text(font_small, "<", (255,255,255)).get_rect(center=col_left.center))
+        screen.blit(render_text(font_small, ">", (255,255,255)), render_text(font_small, ">", (255,255,255)).get_rect(center=col_right.center))
 
         preview_rect = pygame.Rect(cx - 40, cy + 30, 80, 60)
         pygame.draw.rect(screen, BLOCK_COLORS[current_color_idx], preview_rect, border_radius=10)
         pygame.draw.rect(screen, (72, 210, 203), preview_rect, 2, border_radius=10)
 
         # input method selector
-        im_label = font_small.render("INPUT METHOD", True, (180, 180, 180))
+        im_label = render_text(font_small, "INPUT METHOD", (180, 180, 180))
         screen.blit(im_label, im_label.get_rect(center=(cx, cy + 110)))
         im_left = pygame.Rect(cx - 150, cy + 140, 40, 40)
         im_right = pygame.Rect(cx + 110, cy + 140, 40, 40)
         pygame.draw.rect(screen, (70, 70, 80), im_left, border_radius=5)
         pygame.draw.rect(screen, (70, 70, 80), im_right, border_radius=5)
-        screen.blit(font_small.render("<", True, (255,255,255)), font_small.render("<", True, (255,255,255)).get_rect(center=im_left.center))
-        screen.blit(font_small.render(">", True, (255,255,255)), font_small.render(">", True, (255,255,255)).get_rect(center=im_right.center))
+        screen.blit(render_text(font_small, "<", (255,255,255)), render_text(font_small, "<", (255,255,255)).get_rect(center=im_left.center))
+        screen.blit(render_text(font_small, ">", (255,255,255)), render_text(font_small, ">", (255,255,255)).get_rect(center=im_right.center))
         im_text = "Camera" if use_camera else "Keyboard"
 
         if use_camera and not camera_available:
             im_text = "Camera (Unavailable)"
 
-        im_val = font_medium.render(im_text, True, (255, 215, 0))
+        im_val = render_text(font_medium, im_text, (255, 215, 0))
         screen.blit(im_val, im_val.get_rect(center=(cx, cy + 160)))
 
         # invert camera
-        inv_label = font_small.render("INVERT CAMERA", True, (180, 180, 180))
+        inv_label = render_text(font_small, "INVERT CAMERA", (180, 180, 180))
         screen.blit(inv_label, inv_label.get_rect(center=(cx, cy + 190)))
         inv_rect = pygame.Rect(cx - 60, cy + 210, 120, 36)
         inv_color = (40, 50, 70)
         pygame.draw.rect(screen, inv_color, inv_rect, border_radius=6)
         inv_text = "ON" if camera_inverted else "OFF"
         inv_col = (72, 210, 203) if camera_inverted else (160, 160, 160)
-        inv_val = font_small.render(inv_text, True, (255,255,255))
+        inv_val = render_text(font_small, inv_text, (255,255,255))
         pygame.draw.rect(screen, inv_col, (inv_rect.left + 6, inv_rect.top + 6, inv_rect.width - 12, inv_rect.height - 12), border_radius=4)
         screen.blit(inv_val, inv_val.get_rect(center=inv_rect.center))
 
         close_rect = pygame.Rect(cx - 100, cy + 270, 200, 50)
         c_color = (255, 176, 31) if close_rect.collidepoint(mouse_pos) else (255, 170, 20)
         pygame.draw.rect(screen, c_color, close_rect, border_radius=10)
-        close_txt = font_small.render("SAVE & CLOSE", True, (255, 255, 255))
+        close_txt = render_text(font_small, "SAVE & CLOSE", (255, 255, 255))
         screen.blit(close_txt, close_txt.get_rect(center=close_rect.center))
 
 
@@ -234,15 +275,14 @@ def render_settings_overlay(screen,
                             BLOCK_COLORS,
                             font_small, 
                             font_medium, 
-                            font_big):
+                            font_big,
+                            difficulty_locked=False):
     
     if not show_settings:
         return
     
     mouse_pos = pygame.mouse.get_pos()
-    overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    screen.blit(overlay, (0, 0))
+    screen.blit(get_overlay(screen.get_size(), (0, 0, 0, 200)), (0, 0))
 
     cx, cy = screen.get_width() // 2, screen.get_height() // 2
     box_width, box_height = 600, 550
@@ -251,30 +291,32 @@ def render_settings_overlay(screen,
     pygame.draw.rect(screen, (72, 210, 203), box_rect, 3, border_radius=15)
 
     # settings opties
-    s_title = font_medium.render("SETTINGS", True, (255, 255, 255))
+    s_title = render_text(font_medium, "SETTINGS", (255, 255, 255))
     screen.blit(s_title, s_title.get_rect(center=(cx, cy - 180)))
 
     # moeilijkheid selector
-    d_label = font_small.render("DIFFICULTY", True, (180, 180, 180))
+    d_label = render_text(font_small, "DIFFICULTY", (180, 180, 180))
     screen.blit(d_label, d_label.get_rect(center=(cx, cy - 130)))
     diff_left = pygame.Rect(cx - 150, cy - 100, 40, 40)
     diff_right = pygame.Rect(cx + 110, cy - 100, 40, 40)
-    pygame.draw.rect(screen, (70, 70, 80), diff_left, border_radius=5)
-    pygame.draw.rect(screen, (70, 70, 80), diff_right, border_radius=5)
-    screen.blit(font_small.render("<", True, (255,255,255)), font_small.render("<", True, (255,255,255)).get_rect(center=diff_left.center))
-    screen.blit(font_small.render(">", True, (255,255,255)), font_small.render(">", True, (255,255,255)).get_rect(center=diff_right.center))
-    d_val = font_medium.render(f"Level {difficulty_level}", True, (255, 176, 31))
+    # tijdens een liedje ligt de moeilijkheid vast: pijltjes grijs
+    arrow_bg, arrow_fg = ((45, 45, 50), (120, 120, 120)) if difficulty_locked else ((70, 70, 80), (255, 255, 255))
+    pygame.draw.rect(screen, arrow_bg, diff_left, border_radius=5)
+    pygame.draw.rect(screen, arrow_bg, diff_right, border_radius=5)
+    screen.blit(render_text(font_small, "<", arrow_fg), render_text(font_small, "<", arrow_fg).get_rect(center=diff_left.center))
+    screen.blit(render_text(font_small, ">", arrow_fg), render_text(font_small, ">", arrow_fg).get_rect(center=diff_right.center))
+    d_val = render_text(font_medium, f"Level {difficulty_level}", (255, 176, 31))
     screen.blit(d_val, d_val.get_rect(center=(cx, cy - 50)))
 
     # kleur selector
-    c_label = font_small.render("BLOCK COLOR", True, (180, 180, 180))
+    c_label = render_text(font_small, "BLOCK COLOR", (180, 180, 180))
     screen.blit(c_label, c_label.get_rect(center=(cx, cy + 10)))
     col_left = pygame.Rect(cx - 150, cy + 40, 40, 40)
     col_right = pygame.Rect(cx + 110, cy + 40, 40, 40)
     pygame.draw.rect(screen, (70, 70, 80), col_left, border_radius=5)
     pygame.draw.rect(screen, (70, 70, 80), col_right, border_radius=5)
-    screen.blit(font_small.render("<", True, (255,255,255)), font_small.render("<", True, (255,255,255)).get_rect(center=col_left.center))
-    screen.blit(font_small.render(">", True, (255,255,255)), font_small.render(">", True, (255,255,255)).get_rect(center=col_right.center))
+    screen.blit(render_text(font_small, "<", (255,255,255)), render_text(font_small, "<", (255,255,255)).get_rect(center=col_left.center))
+    screen.blit(render_text(font_small, ">", (255,255,255)), render_text(font_small, ">", (255,255,255)).get_rect(center=col_right.center))
 
     preview_rect = pygame.Rect(cx - 40, cy + 30, 80, 60)
     pygame.draw.rect(screen, BLOCK_COLORS[current_color_idx], preview_rect, border_radius=10)
@@ -283,5 +325,5 @@ def render_settings_overlay(screen,
     close_rect = pygame.Rect(cx - 100, cy + 200, 200, 50)
     c_color = (255, 176, 31) if close_rect.collidepoint(mouse_pos) else (255, 170, 20)
     pygame.draw.rect(screen, c_color, close_rect, border_radius=10)
-    close_txt = font_small.render("SAVE & CLOSE", True, (255, 255, 255))
+    close_txt = render_text(font_small, "SAVE & CLOSE", (255, 255, 255))
     screen.blit(close_txt, close_txt.get_rect(center=close_rect.center))
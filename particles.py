@@ -0,0 +1,131 @@
+import random
+import pygame
+import numpy as np
+
+
+class ParticleSystem:
+    """Fixed-capacity particle pool backed by NumPy arrays.
+
+    Position, velocity, size, life and color live in parallel columns;
+    integration, gravity and culling run vectorized, in place, over the
+    slots up to the highest one in use. Dead slots go back on a free-list
+    and are reused by the next `emit`, lowest first, so the live particles
+    stay packed at the front. Updating and drawing write into preallocated
+    scratch buffers, so no NumPy arrays are allocated while playing; only
+    the blit list for pygame is built per frame. Drawing blits pre-rendered
+    fragment sprites, one per (size, color).
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.prev = np.zeros((capacity, 2), np.float32)  # positie voor de laatste stap, voor interpolatie
+        self.vel = np.zeros((capacity, 2), np.float32)
+        self.size = np.zeros((capacity, 2), np.int32)
+        self.life = np.zeros(capacity, np.float32)
+        self.alive = np.zeros(capacity, bool)
+        self.color = np.zeros((capacity, 3), np.uint8)
+        self.free = list(range(capacity - 1, -1, -1))
+        self._hi = 0  # 1 + hoogste slot dat ooit in gebruik was sinds de pool leeg was
+        # scratch buffers voor update en draw
+        self._index = np.arange(capacity, dtype=np.intp)
+        self._slots = np.zeros(capacity, np.intp)
+        self._dead = np.zeros(capacity, bool)
+        self._below = np.zeros(capacity, bool)
+        self._step = np.zeros((capacity, 2), np.float32)
+        self._draw_prev = np.zeros((capacity, 2), np.float32)
+        self._draw_pos = np.zeros((capacity, 2), np.float32)
+        self._draw_xy = np.zeros((capacity, 2), np.int32)
+        self._draw_size = np.zeros((capacity, 2), np.int32)
+        self._draw_color = np.zeros((capacity, 3), np.uint8)
+        self._sprites = {}
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self._hi = 0
+
+    def emit(self, x, y, w, h, vx, vy, color, life=1.2):
+        # pool vol: particle laten vallen i.p.v. te alloceren
+        if not self.free:
+            return None
+        i = self.free.pop()
+        self.pos[i] = (x, y)
+        self.prev[i] = (x, y)
+        self.vel[i] = (vx, vy)
+        self.size[i] = (w, h)
+        self.life[i] = life
+        self.color[i] = color[:3]
+        self.alive[i] = True
+        if i >= self._hi:
+            self._hi = i + 1
+        return i
+
+    def burst(self, x, y, color, count=12, speed=260, size=8, life=0.5):
+        # kleine vonkjes in alle richtingen, bv. bij een hit
+        for _ in range(count):
+            vx = random.uniform(-speed, speed)
+            vy = random.uniform(-speed * 1.5, speed * 0.25)
+            self.emit(x - size // 2, y - size // 2, size, size, vx, vy, color, life)
+
+    def update(self, dt, gravity=800, max_y=None):
+        n = self._hi
+        if not n:
+            return
+        alive = self.alive[:n]
+        pos, vel, life = self.pos[:n], self.vel[:n], self.life[:n]
+        # alles in place op views; dode slots rekenen gewoon mee, emit zet ze opnieuw
+        self.prev[:n] = pos
+        vel[:, 1] += gravity * dt
+        step = np.multiply(vel, dt, out=self._step[:n])
+        pos += step
+        life -= dt
+
+        dead = np.less_equal(life, 0, out=self._dead[:n])
+        if max_y is not None:
+            dead |= np.greater(pos[:, 1], max_y, out=self._below[:n])
+        dead &= alive
+        n_dead = int(np.count_nonzero(dead))
+        if n_dead:
+            np.copyto(alive, False, where=dead)
+            slots = self._slots[:n_dead]
+            np.compress(dead, self._index[:n], out=slots)
+            self.free.extend(slots.tolist())
+            if not np.count_nonzero(alive):
+                self._hi = 0
+
+    def _sprite(self, w, h, r, g, b):
+        key = (w, h, r, g, b)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.rect(sprite, (r, g, b), sprite.get_rect(), border_radius=6)
+            self._sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, mark=None, alpha=1.0):
+        # alpha: hoe ver tussen de vorige en de laatste update (fixed timestep)
+        n = self._hi
+        k = int(np.count_nonzero(self.alive[:n])) if n else 0
+        if not k:
+            return
+        slots = self._slots[:k]
+        np.compress(self.alive[:n], self._index[:n], out=slots)
+        prev = np.take(self.prev, slots, axis=0, out=self._draw_prev[:k])
+        pos = np.take(self.pos, slots, axis=0, out=self._draw_pos[:k])
+        pos -= prev
+        pos *= alpha
+        pos += prev
+        xy = self._draw_xy[:k]
+        np.copyto(xy, pos, casting="unsafe")
+        size = np.take(self.size, slots, axis=0, out=self._draw_size[:k])
+        color = np.take(self.color, slots, axis=0, out=self._draw_color[:k])
+        sprite = self._sprite
+        rects = screen.blits([(sprite(w, h, r, g, b), p)
+                              for p, (w, h), (r, g, b) in zip(xy.tolist(), size.tolist(), color.tolist())])
+        if mark is not None:
+            for r in rects:
+                mark(r)
@@ -0,0 +1,295 @@
+import os
+import sys
+import csv
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+import pygame
+import numpy as np
+
+# fases van de main loop, in volgorde; "inference" loopt op de hand tracker thread
+PHASES = ("events", "camera", "update", "render", "present", "tick", "other", "inference")
+PHASE_COLORS = {
+    "events": (120, 120, 255),
+    "camera": (255, 140, 0),
+    "update": (0, 220, 120),
+    "render": (255, 80, 80),
+    "present": (200, 0, 200),
+    "tick": (90, 90, 90),
+    "other": (200, 200, 200),
+    "inference": (255, 215, 0),
+}
+_FRAME = len(PHASES)  # laatste kolom: totale frame tijd
+
+
+class FrameTimer:
+    """Per-phase frame times of the main loop in a ring buffer.
+
+    `frame()` at the top of the loop closes the previous frame; `mark(phase)`
+    books the time since the previous mark on that phase. Everything after
+    the last mark (music, end-of-song checks) lands in "other". When
+    disabled every call returns right away, so it can stay in the loop.
+    """
+
+    def __init__(self, enabled=False, capacity=1200, target_fps=60):
+        self.always_on = enabled
+        self.enabled = enabled
+        self.overlay = False
+        self.capacity = capacity
+        self.budget_ms = 1000.0 / target_fps if target_fps else None
+        self.frames = np.full((capacity, len(PHASES) + 1), np.nan, np.float32)
+        self.count = 0  # totaal aantal opgenomen frames, ook de overschreven
+        self._col = {name: i for i, name in enumerate(PHASES)}
+        self._row = self._new_row()
+        self._start = None
+        self._last = None
+        self._graph = None
+        self._text = []
+        self._text_at = 0
+
+    @staticmethod
+    def _new_row():
+        row = [0.0] * len(PHASES)
+        row[-1] = np.nan  # inference: enkel in frames met een nieuw camera resultaat
+        return row
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self.always_on
+        if not self.enabled:
+            self._start = self._last = None
+
+    def frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._start is not None:
+            row = self._row
+            row[self._col["other"]] += (now - self._last) * 1000
+            out = self.frames[self.count % self.capacity]
+            out[:len(row)] = row
+            out[_FRAME] = (now - self._start) * 1000
+            self.count += 1
+            self._draw_graph_column(row)
+            self._row = self._new_row()
+        self._start = self._last = now
+
+    def mark(self, phase):
+        if not self.enabled or self._start is None:
+            return
+        now = time.perf_counter()
+        self._row[self._col[phase]] += (now - self._last) * 1000
+        self._last = now
+
+    def value(self, phase, ms):
+        # extern gemeten tijd, bv. inference op de worker thread
+        if self.enabled:
+            self._row[self._col[phase]] = ms
+
+    def recent(self):
+        n = min(self.count, self.capacity)
+        if self.count <= self.capacity:
+            return self.frames[:n]
+        i = self.count % self.capacity
+        return np.concatenate((self.frames[i:], self.frames[:i]))
+
+    def summary(self):
+        """p50/p99 in ms per phase over the ring buffer, plus dropped frames."""
+        data = self.recent()
+        result = {}
+        if not len(data):
+            return result
+        for name, col in list(self._col.items()) + [("frame", _FRAME)]:
+            values = data[:, col]
+            values = values[~np.isnan(values)]
+            if len(values):
+                result[name] = {"p50": float(np.percentile(values, 50)), "p99": float(np.percentile(values, 99))}
+        if self.budget_ms:
+            # gedropt: frame duurde langer dan anderhalve frame budget
+            result["dropped"] = int(np.count_nonzero(data[:, _FRAME] > self.budget_ms * 1.5))
+        result["frames"] = len(data)
+        return result
+
+    # ---------- overlay ----------
+
+    def _draw_graph_column(self, row):
+        graph = self._graph
+        if graph is None or not self.overlay:
+            return
+        # grafiek 1px naar links schuiven en enkel de nieuwe kolom tekenen
+        w, h = graph.get_size()
+        graph.scroll(-1, 0)
+        x = w - 1
+        pygame.draw.line(graph, (15, 15, 25), (x, 0), (x, h))
+        scale = h / (2 * self.budget_ms if self.budget_ms else 33.3)
+        y = h
+        for name in PHASES[:-1]:
+            ms = row[self._col[name]]
+            if ms > 0:
+                top = y - ms * scale
+                pygame.draw.line(graph, PHASE_COLORS[name], (x, y), (x, max(0, top)))
+                y = top
+                if y <= 0:
+                    break
+        if self.budget_ms:
+            by = int(h - self.budget_ms * scale)
+            graph.set_at((x, by), (255, 255, 255))
+
+    def draw(self, screen, font, mark=None):
+        if not self.overlay:
+            return
+        if self._graph is None:
+            self._graph = pygame.Surface((360, 120)).convert()
+            self._graph.fill((15, 15, 25))
+
+        # tekst maar een paar keer per seconde opnieuw, anders meet de overlay vooral zichzelf
+        if self.count - self._text_at >= 20 or not self._text:
+            self._text_at = self.count
+            s = self.summary()
+            lines = [(f"{'phase':<10}{'p50':>7}{'p99':>7}", (255, 255, 255))]
+            for name in PHASES + ("frame",):
+                if name in s:
+                    lines.append((f"{name:<10}{s[name]['p50']:>7.2f}{s[name]['p99']:>7.2f}",
+                                  PHASE_COLORS.get(name, (255, 255, 255))))
+            if "dropped" in s:
+                lines.append((f"dropped {s['dropped']}/{s['frames']}", (255, 120, 120)))
+            self._text = [font.render(text, True, color) for text, color in lines]
+
+        x, y = 10, 10
+        panel = pygame.Rect(x - 6, y - 6, 372, 132 + len(self._text) * (font.get_linesize()))
+        screen.fill((0, 0, 0), panel)
+        screen.blit(self._graph, (x, y))
+        y += self._graph.get_height() + 6
+        for surf in self._text:
+            screen.blit(surf, (x, y))
+            y += font.get_linesize()
+        if mark is not None:
+            mark(panel)
+
+    # ---------- dump ----------
+
+    def dump(self, path):
+        """Writes the ring buffer per frame to a .csv or .jsonl file; returns the number of frames."""
+        data = self.recent()
+        if not len(data):
+            return 0
+        columns = PHASES + ("frame",)
+        tmp = path + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for row in data.tolist():
+                    f.write(json.dumps({c: (None if v != v else round(v, 4)) for c, v in zip(columns, row)}) + "\n")
+            else:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in data.tolist():
+                    writer.writerow(["" if v != v else round(v, 4) for v in row])
+        os.replace(tmp, path)
+        return len(data)
+
+
+class ProfileCapture:
+    """Deep profile of the next N frames (or seconds) of the main loop.
+
+    Runs cProfile on the main thread and, next to it, a sampler thread that
+    records the main thread's stack every `interval` seconds. The result is
+    a timestamped .pstats file plus a collapsed-stack .folded file
+    ("a;b;c count" per line, for flamegraph.pl or speedscope). Files are
+    written on a background thread; music and song clock keep running
+    throughout, the game just runs slower while cProfile is on.
+    """
+
+    def __init__(self, out_dir="profiles", interval=0.002):
+        self.out_dir = out_dir
+        self.interval = interval
+        self._prof = None
+        self._frames_left = 0
+        self._until = None
+        self._samples = None
+        self._stop = None
+        self._sampler = None
+        self._switch_interval = None
+        self._writers = []
+
+    @property
+    def active(self):
+        return self._prof is not None
+
+    def start(self, frames=None, seconds=None):
+        """Starts a capture from the calling (main) thread; False if one is already running."""
+        if self._prof is not None:
+            return False
+        self._frames_left = frames or 0
+        self._until = time.perf_counter() + seconds if seconds else None
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, args=(threading.get_ident(),),
+                                         name="profile-sampler", daemon=True)
+        # vaker van thread wisselen, anders ziet de sampler enkel de plekken waar de GIL vrijkomt
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._sampler.start()
+        self._prof = cProfile.Profile()
+        self._prof.enable()
+        print(f"[profile] capturing {f'{frames} frames' if frames else f'{seconds}s'}", flush=True)
+        return True
+
+    def frame(self):
+        # een keer per loop iteratie
+        if self._prof is None:
+            return
+        self._frames_left -= 1
+        if self._until is not None:
+            if time.perf_counter() >= self._until:
+                self.stop()
+        elif self._frames_left <= 0:
+            self.stop()
+
+    def stop(self, wait=False):
+        """Ends the capture and writes the files; `wait` blocks until every capture is on disk (at exit)."""
+        if self._prof is not None:
+            self._finish()
+        if wait:
+            # writer threads zijn daemons: bij afsluiten zouden ze halverwege gekild worden
+            for writer in self._writers:
+                writer.join()
+        self._writers = [w for w in self._writers if w.is_alive()]
+
+    def _finish(self):
+        prof, self._prof = self._prof, None
+        prof.disable()
+        self._stop.set()
+        self._sampler.join(timeout=1.0)
+        sys.setswitchinterval(self._switch_interval)
+        base = os.path.join(self.out_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        # wegschrijven mag de game loop niet ophouden
+        writer = threading.Thread(target=self._write, args=(prof, self._samples, base),
+                                  name="profile-writer", daemon=True)
+        writer.start()
+        self._writers.append(writer)
+
+    def _sample(self, thread_id):
+        samples = self._samples
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                samples[";".join(reversed(stack))] += 1
+
+    def _write(self, prof, samples, base):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            pstats.Stats(prof).dump_stats(base + ".pstats")
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            print(f"[profile] wrote {base}.pstats and {base}.folded ({sum(samples.values())} samples)", flush=True)
+        except OSError as e:
+            print(f"[profile] could not write {base}: {e}", flush=True)
@@ -0,0 +1,321 @@
+"""Replay logs: every run as a compact binary file, and a player that re-simulates it.
+
+    python replay.py replays/20261017-201500-rush-e.mhr            # score opnieuw uitrekenen
+    python replay.py replays/*.mhr --song songs/rush-e             # song map expliciet opgeven
+
+The player runs the log through the headless engine (as fast as it can)
+and prints the replayed score next to the recorded one as JSON; the exit
+code is 1 when one of them does not match (or the log is incomplete).
+
+File layout: a header (chart digest, difficulty, lanes, sim rate, screen
+size, song name) and then one event per press or hand movement.
+An event is a tag byte (kind << 4 | lane) followed by varints: the number
+of sim steps and the microseconds since the previous event, and for a
+slice the segment end points relative to the previous slice. A typical
+press takes 4-5 bytes. An END event with the final score closes the log.
+"""
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+
+# stdout is enkel JSON, dus geen pygame welkomstboodschap
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from chart_cache import load_chart
+from game_logic import DIFFICULTY_BLOCK_SIZE
+from songs import find_songs, song_from_folder
+
+REPLAY_MAGIC = b"MHRP"
+REPLAY_VERSION = 2
+# magic, version, difficulty, lanes, chart digest, sim hz, screen w, screen h, name length
+# geen random seed: de spelregels gebruiken geen toeval, enkel de vonkjes doen dat
+_HEADER = struct.Struct("<4sBBB16sHHHH")
+
+PRESS, SLICE, END = 0, 1, 15
+
+
+def quantize(t):
+    """Song time rounded to the microseconds a log stores; judge on this value so a replay matches exactly."""
+    return round(t * 1_000_000) / 1_000_000
+
+
+def _varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _zigzag(out, n):
+    # negatieve deltas ook in weinig bytes
+    _varint(out, (n << 1) if n >= 0 else ((-n << 1) - 1))
+
+
+class ReplayWriter:
+    """Streams one run to disk while it is being played.
+
+    Events are encoded into a small scratch buffer and handed to a buffered
+    file, so the game loop only pays for a few bytes of Python per press; the
+    OS write happens once per `buffer_size` bytes. A log without END (game
+    closed mid-song) still replays, it is just marked incomplete. A disk
+    error stops the recording, not the game: the writer prints it once,
+    closes, and ignores the rest of the run.
+    """
+
+    def __init__(self, path, digest, difficulty, lanes, sim_hz, screen_size, song_name="", buffer_size=1 << 16):
+        self.path = path
+        self._file = open(path, "wb", buffering=buffer_size)
+        name = song_name.encode("utf-8")[:0xFFFF]
+        try:
+            self._file.write(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, difficulty, lanes, digest[:16].ljust(16, b"\0"),
+                                          sim_hz, screen_size[0], screen_size[1], len(name)))
+            self._file.write(name)
+        except OSError:
+            self._file.close()
+            raise
+        self._buf = bytearray()
+        self._tick = 0
+        self._us = 0
+        self._point = (0, 0)
+        self.events = 0
+
+    @classmethod
+    def for_song(cls, out_dir, song_name, chart, difficulty, lanes, sim_hz, screen_size):
+        """A new log in `out_dir`, named after the start time and the song; None when it cannot be created."""
+        safe = "".join(c if c.isalnum() or c in "-_" else "-" for c in song_name)[:40]
+        path = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}.mhr")
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            return cls(path, chart.digest, difficulty, lanes, sim_hz, screen_size, song_name)
+        except OSError as e:
+            print(f"[replay] could not create {path}: {e}", flush=True)
+            return None
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def _stop(self, reason):
+        # enkel de opname stopt, het spel speelt gewoon door
+        print(f"[replay] {reason}, recording stopped", flush=True)
+        f, self._file = self._file, None
+        try:
+            f.close()
+        except OSError:
+            pass  # de rest van de buffer raakt ook niet meer weg, al gemeld
+
+    def _write(self, data):
+        try:
+            self._file.write(data)
+        except OSError as e:
+            self._stop(f"could not write {self.path}: {e}")
+
+    def _event(self, kind, lane, tick, t):
+        """The encoded event in the scratch buffer, or None when the recording had to stop."""
+        buf = self._buf
+        buf.clear()
+        if tick < self._tick:
+            # de sim loopt nooit terug binnen een run; dan is de sim klok niet gereset bij de start
+            self._stop(f"tick went backwards in {self.path}: {tick} after {self._tick}")
+            return None
+        buf.append(kind << 4 | lane)
+        _varint(buf, tick - self._tick)
+        us = round(t * 1_000_000)
+        _zigzag(buf, us - self._us)
+        self._tick = tick
+        self._us = us
+        self.events += 1
+        return buf
+
+    def press(self, tick, t, lane):
+        # tick: sim stappen die al gedaan waren, t: songtijd van de aanslag (gequantized)
+        if self._file is None:
+            return
+        buf = self._event(PRESS, lane, tick, t)
+        if buf is not None:
+            self._write(buf)
+
+    def slice(self, tick, t, p1, p2):
+        if self._file is None:
+            return
+        buf = self._event(SLICE, 0, tick, t)
+        if buf is None:
+            return
+        # punten relatief t.o.v. het vorige segment: een vinger beweegt maar een klein stukje per frame
+        x, y = self._point
+        for px, py in (p1, p2):
+            _zigzag(buf, int(px) - x)
+            _zigzag(buf, int(py) - y)
+            x, y = int(px), int(py)
+        self._point = (x, y)
+        self._write(buf)
+
+    def finish(self, tick, t, score):
+        """Closes the log with the final score, for the audit."""
+        if self._file is None:
+            return
+        buf = self._event(END, 0, tick, t)
+        if buf is None:
+            return
+        _zigzag(buf, int(score))
+        self._write(buf)
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            f, self._file = self._file, None
+            try:
+                f.close()  # schrijft de buffer nog weg
+            except OSError as e:
+                print(f"[replay] could not write {self.path}: {e}", flush=True)
+
+
+class Replay:
+    def __init__(self, digest, difficulty, lanes, sim_hz, screen_size, song_name, events, score):
+        self.digest = digest
+        self.difficulty = difficulty
+        self.lanes = lanes
+        self.sim_hz = sim_hz
+        self.screen_size = screen_size
+        self.song_name = song_name
+        self.events = events  # (tick, t, kind, lane, p1, p2)
+        self.score = score    # None = log zonder END
+
+    @property
+    def complete(self):
+        return self.score is not None
+
+
+def read_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path}: too short for a replay")
+    magic, version, difficulty, lanes, digest, sim_hz, w, h, name_len = _HEADER.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path}: not a version {REPLAY_VERSION} replay")
+    if difficulty not in DIFFICULTY_BLOCK_SIZE or not lanes or not sim_hz:
+        raise ValueError(f"{path}: bad header (difficulty {difficulty}, lanes {lanes}, sim hz {sim_hz})")
+    pos = _HEADER.size
+    name = data[pos:pos + name_len].decode("utf-8", "replace")
+    pos += name_len
+
+    end = len(data)
+
+    def varint():
+        nonlocal pos
+        n = shift = 0
+        while True:
+            if pos >= end:
+                raise EOFError
+            b = data[pos]
+            pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def zigzag():
+        n = varint()
+        return (n >> 1) ^ -(n & 1)
+
+    events = []
+    score = None
+    tick = us = 0
+    x = y = 0
+    while pos < end:
+        start = pos
+        try:
+            tag = data[pos]
+            pos += 1
+            kind, lane = tag >> 4, tag & 0x0F
+            tick += varint()
+            us += zigzag()
+            t = us / 1_000_000
+            if kind == END:
+                score = zigzag()
+                break
+            if kind == SLICE:
+                x1 = x + zigzag()
+                y1 = y + zigzag()
+                x2 = x1 + zigzag()
+                y2 = y1 + zigzag()
+                x, y = x2, y2
+                events.append((tick, t, SLICE, 0, (x1, y1), (x2, y2)))
+            elif kind == PRESS:
+                events.append((tick, t, PRESS, lane, None, None))
+            else:
+                raise ValueError(f"{path}: unknown event kind {kind} at byte {start}")
+        except EOFError:
+            # afgebroken tijdens het schrijven: alles tot het laatste volledige event telt
+            break
+    return Replay(digest, difficulty, lanes, sim_hz, (w, h), name, events, score)
+
+
+def find_chart(replay, song_dir="songs", song=None):
+    """The song whose chart digest matches the replay; raises LookupError if there is none."""
+    if song:
+        candidates = [song_from_folder(song)]
+    else:
+        # eerst de map met dezelfde naam, dan de rest van de bibliotheek
+        candidates = sorted(find_songs(song_dir), key=lambda s: s["name"] != replay.song_name)
+    for s in candidates:
+        chart = load_chart(s["midi"])
+        if bytes(chart.digest)[:16].ljust(16, b"\0") == replay.digest:
+            return s, chart
+    raise LookupError(f"no song with chart digest {replay.digest.hex()} ({replay.song_name or 'unknown'})")
+
+
+def play(replay, chart):
+    """Re-simulates a replay on the headless engine; returns the engine's summary."""
+    from engine import HeadlessGame
+    game = HeadlessGame(chart, replay.difficulty, replay.sim_hz, replay.screen_size, replay.lanes)
+    for tick, t, kind, lane, p1, p2 in replay.events:
+        # het event gebeurde nadat het spel `tick` stappen gedaan had
+        while game.steps < tick:
+            game.step()
+        if kind == PRESS:
+            game.press(lane, t)
+        else:
+            game.slice(p1, p2)
+    while not game.done:
+        game.step()
+    return game.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate replay logs and check the recorded score.")
+    parser.add_argument("replays", nargs="+", help=".mhr files")
+    parser.add_argument("--song-dir", default="songs")
+    parser.add_argument("--song", help="song folder to use instead of searching --song-dir by chart digest")
+    args = parser.parse_args(argv)
+
+    results = []
+    ok = True
+    for path in args.replays:
+        try:
+            replay = read_replay(path)
+            song, chart = find_chart(replay, args.song_dir, args.song)
+        except (OSError, ValueError, LookupError) as e:
+            # een kapotte of onbekende log, de rest van de audit gaat gewoon door
+            results.append({"replay": path, "error": str(e)})
+            ok = False
+            continue
+        t0 = time.perf_counter()
+        result = play(replay, chart)
+        wall = time.perf_counter() - t0
+        match = replay.complete and result["score"] == replay.score
+        ok = ok and match
+        results.append({"replay": path, "song": song["name"], "difficulty": replay.difficulty,
+                        "events": len(replay.events), "complete": replay.complete,
+                        "recorded_score": replay.score, **result, "match": match,
+                        "wall_s": round(wall, 3),
+                        "realtime_factor": round(result["song_time"] / wall, 1) if wall else None})
+    print(json.dumps(results if len(results) > 1 else results[0], indent=2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import sqlite3
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id     INTEGER PRIMARY KEY,
+    song   TEXT NOT NULL,
+    player TEXT NOT NULL,
+    score  INTEGER NOT NULL,
+    level  INTEGER NOT NULL,
+    date   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scores_song_level_score ON scores (song, level, score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_song_score ON scores (song, score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_player ON scores (player);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _entry(row):
+    # zelfde vorm als de oude scores.json entries, zodat de scoreboards niet moeten veranderen
+    player, score, level, date = row
+    return {"name": player, "score": score, "level": level, "date": date}
+
+
+class ScoreStore:
+    """Scores in an embedded SQLite database.
+
+    Every write is its own transaction (WAL journal), so a crash can lose at
+    most the score being written, never the rest of the board. Top lists are
+    cached in memory per song/level; the cache is dropped on our own writes
+    and when SQLite's data_version shows another process wrote, checked at
+    most every CHECK_INTERVAL seconds.
+    """
+
+    CHECK_INTERVAL = 2.0
+
+    def __init__(self, path, json_path=None):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.executescript(_SCHEMA)
+        self._cache = {}
+        self._data_version = self._read_data_version()
+        self._checked_at = time.monotonic()
+        if json_path:
+            self.import_json(json_path)
+
+    def _read_data_version(self):
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external(self):
+        if time.monotonic() - self._checked_at < self.CHECK_INTERVAL:
+            return
+        self._checked_at = time.monotonic()
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._cache.clear()
+
+    def invalidate(self):
+        self._cache.clear()
+
+    def import_json(self, json_path):
+        """One-time import of the old scores.json; does nothing once imported."""
+        done = self.db.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if done or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[scores] could not import {json_path}: {e}")
+            return 0
+
+        rows = [(song, e.get('name', '?'), int(e.get('score', 0)), int(e.get('level', 1)), e.get('date', ''))
+                for song, entries in data.items() for e in entries]
+        with self.db:
+            self.db.executemany("INSERT INTO scores (song, player, score, level, date) VALUES (?, ?, ?, ?, ?)", rows)
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", (datetime.now().isoformat(),))
+        self.invalidate()
+        return len(rows)
+
+    def top(self, song_key, n=10, level=None):
+        self._check_external()
+        key = (song_key, level, n)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if level is None:
+            rows = self.db.execute("SELECT player, score, level, date FROM scores WHERE song = ? "
+                                   "ORDER BY score DESC, id LIMIT ?", (song_key, n))
+        else:
+            rows = self.db.execute("SELECT player, score, level, date FROM scores WHERE song = ? AND level = ? "
+                                   "ORDER BY score DESC, id LIMIT ?", (song_key, level, n))
+        result = self._cache[key] = [_entry(r) for r in rows]
+        return result
+
+    def personal_best(self, player, song_key=None, level=None):
+        sql = "SELECT player, score, level, date FROM scores WHERE player = ?"
+        args = [player]
+        if song_key is not None:
+            sql += " AND song = ?"
+            args.append(song_key)
+        if level is not None:
+            sql += " AND level = ?"
+            args.append(level)
+        row = self.db.execute(sql + " ORDER BY score DESC, id LIMIT 1", args).fetchone()
+        return _entry(row) if row else None
+
+    def rank(self, song_key, sc, level=None):
+        """1-based position a score of `sc` has (or would have) on the song's board."""
+        if level is None:
+            row = self.db.execute("SELECT COUNT(*) FROM scores WHERE song = ? AND score > ?", (song_key, sc))
+        else:
+            row = self.db.execute("SELECT COUNT(*) FROM scores WHERE song = ? AND level = ? AND score > ?",
+                                  (song_key, level, sc))
+        return row.fetchone()[0] + 1
+
+    def add(self, song_key, name, sc, level, n=50):
+        """Stores a score; returns the song's updated top-n list."""
+        with self.db:
+            self.db.execute("INSERT INTO scores (song, player, score, level, date) VALUES (?, ?, ?, ?, ?)",
+                            (song_key, name, int(sc), int(level), datetime.now().isoformat()))
+        self.invalidate()
+        return self.top(song_key, n)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,130 @@
+import time
+import pygame
+
+
+def mixer_position():
+    """Seconds of music the mixer has played, or None when nothing is playing."""
+    try:
+        pos = pygame.mixer.music.get_pos()
+    except pygame.error:
+        return None
+    return pos / 1000.0 if pos >= 0 else None
+
+
+class SongClock:
+    """Song time that follows the audio instead of the wall clock.
+
+    Song time 0 is the moment the player starts; the music itself begins at
+    `lead_time`, so while it plays the song time should equal
+    audio position + lead_time - audio_offset. In between audio readings (and
+    during the lead-in) the clock runs on perf_counter.
+
+    pygame 2 interpolates get_pos() itself, so a reading is the position
+    right now. Older mixers only move it once per audio buffer: when readings
+    repeat or jump by more than the time between them, the jump happened
+    somewhere since the previous call (and within one buffer), and the clock
+    assumes halfway.
+
+    Every `time()` call compares the two. Small drift is slewed away over
+    `correction` seconds; an error above `snap` (mixer start-up, a hitch) is
+    fixed at once. The clock never runs backwards: when it is ahead it just
+    slows down. Pausing freezes it and the mixer alike, so no time is lost
+    on resume.
+    """
+
+    def __init__(self, audio_offset=0.0, correction=0.5, snap=0.1, audio_position=mixer_position,
+                 clock=time.perf_counter):
+        self.audio_offset = audio_offset  # latency van de audio output in seconden, positief = geluid komt later
+        self.correction = correction
+        self.snap = snap
+        self.audio_position = audio_position
+        self.clock = clock
+        self.lead_time = 0.0
+        self.running = False
+        self.audio_started = False
+        self._base = 0.0        # songtijd op het moment _anchor
+        self._anchor = 0.0      # perf_counter
+        self._last = 0.0
+        self._synced_at = 0.0
+        self._polled_at = 0.0
+        self._last_pos = None
+        self._repeated = False  # get_pos() gaf sinds de vorige sprong dezelfde waarde terug
+        self._step = float("inf")  # kleinste sprong van get_pos(), bij een oude mixer de buffer
+        self._stepped = 0       # >0: get_pos() springt per buffer
+        self.drift = 0.0        # laatste gemeten verschil audio - klok, voor debug
+
+    def start(self, lead_time=0.0):
+        self.lead_time = lead_time
+        self.audio_started = False
+        self._last_pos = None
+        self._repeated = False
+        self._step = float("inf")
+        self._stepped = 0
+        self._base = 0.0
+        self._anchor = self._synced_at = self._polled_at = self.clock()
+        self._last = 0.0
+        self.drift = 0.0
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self._base = self._last = 0.0
+
+    def pause(self):
+        if self.running:
+            self._base = self._last = self.time()
+            self.running = False
+
+    def resume(self):
+        if not self.running:
+            self._anchor = self._synced_at = self._polled_at = self.clock()
+            self.running = True
+
+    def music_started(self):
+        # vanaf nu mag de audio positie de klok bijsturen
+        self.audio_started = True
+
+    def time(self):
+        if not self.running:
+            return self._last
+        now = self.clock()
+        t = self._base + (now - self._anchor)
+
+        if self.audio_started:
+            pos = self.audio_position()
+            if pos is not None and pos == self._last_pos:
+                if pos > 0:  # voor de start staat get_pos() ook stil
+                    self._repeated = True
+            elif pos is not None:
+                audio_time = pos + self.lead_time - self.audio_offset
+                since_poll = now - self._polled_at
+                if self._last_pos is not None and pos > self._last_pos:
+                    jump = pos - self._last_pos
+                    self._step = min(self._step, jump)
+                    # een geinterpoleerde get_pos() loopt gelijk op met de klok; een per-buffer get_pos()
+                    # blijft staan of springt een buffer verder. Een paar metingen na elkaar beslissen,
+                    # zodat een enkele hapering de modus niet omgooit
+                    if self._repeated or abs(jump - since_poll) > 0.005:
+                        self._stepped = min(self._stepped + 1, 8)
+                    elif self._stepped:
+                        self._stepped -= 1
+                    if self._stepped:
+                        # de sprong gebeurde ergens sinds de vorige call (en binnen een buffer): gemiddeld halverwege
+                        audio_time += min(since_poll, self._step) / 2
+                self._last_pos = pos
+                self._repeated = False
+                error = audio_time - t
+                self.drift = error
+                if abs(error) > self.snap:
+                    t = audio_time
+                else:
+                    # een deel van de fout wegwerken, evenredig met de tijd sinds de vorige meting
+                    t += error * min(1.0, (now - self._synced_at) / self.correction)
+                self._base, self._anchor = t, now
+                self._synced_at = now
+
+        self._polled_at = now
+        if t < self._last:
+            t = self._last
+        self._last = t
+        return t
@@ -1,6 +1,120 @@
 import os
-import mido
+import json
 import pygame
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from chart_cache import load_chart
+from game_logic import peak_notes_in_window
+
+# een worker is genoeg: er laadt maar een liedje tegelijk
+_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="song-loader")
+
+# manifest met metadata per liedje, zodat we niet elke start alle midi's moeten parsen
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2  # 2: peak_nps telt een noot precies 1s later mee
+
+
+def _scan_folder(path):
+    # zoekt de midi en de cover in een liedjesmap
+    midi = None
+    image = None
+    with os.scandir(path) as it:
+        for entry in it:
+            f = entry.name.lower()
+            if f.endswith((".mid", ".midi")):
+                midi = entry.path
+            elif f.endswith((".png", ".jpg", ".jpeg")):
+                image = entry.path
+    return midi, image
+
+
+def _mtime(path):
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _analyse(midi):
+    chart = load_chart(midi)
+    times = np.frombuffer(chart.times, dtype=np.float64)
+    # meeste noten binnen eender welk venster van 1 seconde
+    return {"duration": chart.length, "notes": len(times), "peak_nps": peak_notes_in_window(times, 1.0)}
+
+
+def _load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data.get("songs", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _save_manifest(path, entries):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "songs": entries}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[songs] could not write manifest: {e}")
+
+
+def scan_library(song_dir):
+    """Returns the manifest entries for every playable song folder.
+
+    Folders whose directory, MIDI and cover mtimes match the manifest are
+    reused as-is; only new or changed folders are scanned and analysed.
+    """
+    manifest_path = os.path.join(song_dir, MANIFEST_NAME)
+    old = _load_manifest(manifest_path)
+    entries = {}
+    changed = False
+
+    with os.scandir(song_dir) as it:
+        folders = sorted((e for e in it if e.is_dir()), key=lambda e: e.name.lower())
+
+    for entry in folders:
+        dir_mtime = entry.stat().st_mtime_ns
+        prev = old.get(entry.name)
+        if (prev and prev["dir_mtime"] == dir_mtime
+                and prev["midi_mtime"] == _mtime(prev["midi"])
+                and prev["image_mtime"] == _mtime(prev["image"])):
+            entries[entry.name] = prev
+            continue
+
+        changed = True
+        midi, image = _scan_folder(entry.path)
+        info = None
+        if midi and image:
+            try:
+                info = _analyse(midi)
+            except Exception as e:
+                print(f"[songs] skipping {entry.name}: {e}")
+
+        if info is None:
+            # onbruikbare map toch onthouden, anders wordt ze elke start opnieuw gescand
+            entries[entry.name] = {"midi": None, "image": None, "dir_mtime": dir_mtime,
+                                   "midi_mtime": None, "image_mtime": None}
+            continue
+
+        entries[entry.name] = {
+            "midi": midi,
+            "image": image,
+            "dir_mtime": dir_mtime,
+            "midi_mtime": _mtime(midi),
+            "image_mtime": _mtime(image),
+            **info,
+        }
+
+    if changed or len(entries) != len(old):
+        _save_manifest(manifest_path, entries)
+    return entries
 
 
 def find_songs(song_dir):
@@ -8,47 +122,63 @@ def find_songs(song_dir):
     if not os.path.exists(song_dir):
         return songs
 
-    for folder in os.listdir(song_dir):
-        path = os.path.join(song_dir, folder)
-        if not os.path.isdir(path):
+    for name, e in scan_library(song_dir).items():
+        if not e["midi"]:
             continue
+        songs.append({
+            "name": name,
+            "midi": e["midi"],
+            "image": e["image"],
+            "duration": e["duration"],
+            "notes": e["notes"],
+            "peak_nps": e["peak_nps"],
+        })
 
-        midi = None
-        image = None
-        for f in os.listdir(path):
-            if f.lower().endswith((".mid", ".midi")):
-                midi = os.path.join(path, f)
-            elif f.lower().endswith((".png", ".jpg", ".jpeg")):
-                image = os.path.join(path, f)
+    return songs
 
-        if midi and image:
-            songs.append({
-                "name": folder,
-                "midi": midi,
-                "image": image
-            })
 
-    return songs
+def song_from_folder(path):
+    """Song dict for a single song folder, like find_songs returns (without the manifest stats)."""
+    midi, image = _scan_folder(path)
+    if not midi:
+        raise FileNotFoundError(f"no MIDI file in {path}")
+    return {"name": os.path.basename(os.path.normpath(path)), "midi": midi, "image": image}
 
 
-def load_song(song, screen):
-    """Loads the MIDI into the mixer, parses notes and returns (background, notes).
+def prepare_song(song, size):
+    """Does the slow part of loading a song: the chart and the scaled background.
 
-    This function does not mutate game state; the caller should reset active
-    blocks, score and other state as needed.
+    Safe to run off the main thread; nothing here touches the display or the
+    mixer. Returns (chart, background) where background is not converted yet.
     """
+    # notes komen uit de gecompileerde chart cache, niet meer uit mido
+    chart = load_chart(song["midi"])
+
+    bg = pygame.image.load(song["image"])
+    bg = pygame.transform.scale(bg, size)
+    return chart, bg
+
+
+def finish_song(song, prepared):
+    """Main-thread half of loading: hands the MIDI to the mixer and converts the background."""
+    chart, bg = prepared
     pygame.mixer.music.load(song["midi"])
+    return bg.convert(), chart, chart.length
+
+
+def load_song_async(song, screen):
+    """Starts preparing a song on the loader thread and returns the future.
+
+    Pass the future's result to finish_song on the main thread. A pending
+    load can be dropped with future.cancel() or by ignoring its result.
+    """
+    return _loader.submit(prepare_song, song, screen.get_size())
 
-    mid = mido.MidiFile(song["midi"])
-    notes = []
-    t = 0
-    for msg in mid:
-        t += msg.time
-        if getattr(msg, "type", None) == "note_on" and getattr(msg, "velocity", 0) > 0:
-            notes.append({"note": msg.note, "time": t})
 
-    bg = pygame.image.load(song["image"]).convert()
-    bg = pygame.transform.scale(bg, screen.get_size())
+def load_song(song, screen):
+    """Loads the MIDI into the mixer and returns (background, chart, length).
 
-    # t now holds the approximate song length (seconds)
-    return bg, notes, t
+    This function does not mutate game state; the caller should reset active
+    blocks, score and other state as needed.
+    """
+    return finish_song(song, prepare_song(song, screen.get_size()))